@@ -3,25 +3,56 @@ import sys
 import os
 import argparse
 import signal
+import json
+import clingo
 from collections import namedtuple
 import solver
 import lns
+import parallel
 import initial
 import strategy
 import config
 import json_config
 import relax
 import search
+import tracing
+import stream
+import checkpoint
+import bound
 logger = config.setup_logger('root')
 
 def print_model(atoms):
-    for a in atoms:
-        print(a, end=' ')
-    print(" ")
+    print(''.join(str(a) + ' ' for a in atoms) + ' ')
 
 
-def main(program, initial_operator, relax_operators, search_operators, strat, internal_solver, global_timeout):
-    solver = lns.ClingoLNS(internal_solver, program, initial_operator, relax_operators, search_operators, strat)
+def main(program, initial_operator, relax_operators, search_operators, strat, internal_solver, global_timeout,
+         core_guided, recycle, trace, solution_stream, checkpointer, resume_state, unsat_memo,
+         pipeline, prover):
+    recycle_policy = None
+    if recycle is not None:
+        recycle_policy = lns.RecyclePolicy(**recycle)
+
+    memo = None
+    if unsat_memo is not None:
+        memo = lns.UnsatMemo(unsat_memo)
+
+    tracer = None
+    if trace is not None:
+        tracer = tracing.MoveTracer(trace)
+
+    solver = lns.ClingoLNS(internal_solver, program, initial_operator, relax_operators, search_operators, strat,
+                           core_guided=core_guided, recycle_policy=recycle_policy, tracer=tracer,
+                           stream=solution_stream, checkpointer=checkpointer, unsat_memo=memo,
+                           pipeline=pipeline, prover=prover)
+
+    if resume_state is not None:
+        checkpoint.restore(resume_state, strat)
+
+    def exit_search():
+        # the pending solutions of the stream are written before exiting
+        if solution_stream is not None:
+            solution_stream.close()
+        sys.exit(0)
 
     def signal_handler(sig, frame):
         nonlocal solver, strat
@@ -48,7 +79,7 @@ def main(program, initial_operator, relax_operators, search_operators, strat, in
                 if search == '':
                     break
                 if search.upper() == 'C':
-                    sys.exit(0)
+                    exit_search()
                 if search.isdigit():
                     search_index = int(search)
                     if 0 <= search_index < len(search_operators):
@@ -65,7 +96,7 @@ def main(program, initial_operator, relax_operators, search_operators, strat, in
                 if nh == '':
                     break
                 if nh.upper() == 'C':
-                    sys.exit(0)
+                    exit_search()
                 if nh.isdigit():
                     nh_index = int(nh)
                     if 0 <= nh_index < len(relax_operators):
@@ -75,12 +106,59 @@ def main(program, initial_operator, relax_operators, search_operators, strat, in
 
             strat.set_operators(relax_op, search_op)
         else:
-            sys.exit(0)
+            exit_search()
 
 
     signal.signal(signal.SIGINT, signal_handler)
 
-    solution = solver.solve(global_timeout)
+    try:
+        solution = solver.solve(global_timeout)
+    finally:
+        if tracer is not None:
+            tracer.close()
+        if solution_stream is not None:
+            solution_stream.close()
+
+    if solution is not None:
+        print_model(solution.model.shown)
+        print("Costs: " + str(solution.cost))
+    else:
+        print("No solution found!")
+
+
+def main_parallel(program, workers, solver_type, solver_args, portfolio, seed, pre_opt_time, global_timeout,
+                  core_guided, recycle, trace, solution_stream, warm_start, unsat_memo,
+                  pipeline, prover):
+    solver = parallel.ParallelClingoLNS(workers, program, solver_type, solver_args, portfolio, seed,
+                                        pre_opt_time=pre_opt_time, core_guided=core_guided, recycle=recycle,
+                                        trace=trace, stream=solution_stream, warm_start=warm_start,
+                                        unsat_memo=unsat_memo, pipeline=pipeline, prover=prover)
+
+    def signal_handler(sig, frame):
+        nonlocal solver
+        sys.stderr.flush()
+        sys.stdout.flush()
+        print('Search interrupted!')
+
+        if solver.best_solution is not None:
+            print_model(solver.best_solution.model.shown)
+            print("Costs: " + str(solver.best_solution.cost))
+        else:
+            print("No solution found!")
+
+        # the pending solutions of the stream are written before exiting
+        if solution_stream is not None:
+            solution_stream.close()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, signal_handler)
+
+    try:
+        solution = solver.solve(global_timeout)
+    finally:
+        if solution_stream is not None:
+            solution_stream.close()
+
     if solution is not None:
         print_model(solution.model.shown)
         print("Costs: " + str(solution.cost))
@@ -157,9 +235,72 @@ if __name__ == '__main__':
     parser.add_argument('-ia', '--interactive', action='store_true',
                         help='select interactive selection strategy')
     parser.set_defaults(interactive=False)
+
+    parser.add_argument('-cg', '--core-guided', action='store_true',
+                        help='whether or not the unsatisfiable core of a failed move should be relaxed in the next move')
+    parser.set_defaults(core_guided=False)
+
+    parser.add_argument('-rm', '--recycle-moves', type=int, metavar='<n>', default=None,
+                        help='rebuild the solver from the cached program every <n> moves')
+
+    parser.add_argument('-rmem', '--recycle-memory', type=int, metavar='<MB>', default=None,
+                        help='rebuild the solver from the cached program once the memory exceeds <MB> megabytes')
+
+    parser.add_argument('-rs', '--recycle-slowdown', type=float, metavar='<f>', default=None,
+                        help='rebuild the solver from the cached program once moves become <f> times slower')
+
+    parser.add_argument('-um', '--unsat-memo', type=int, metavar='<n>', default=None,
+                        help='remember the last <n> unsatisfiable moves and redraw moves known to be unsatisfiable')
+
+    parser.add_argument('-pl', '--pipeline', action='store_true',
+                        help='compute the relaxation of the next move while the current move is solved')
+    parser.set_defaults(pipeline=False)
+
+    parser.add_argument('-lb', '--lower-bound', action='store_true',
+                        help='prove lower bounds in a separate process with core guided optimization and stop once the incumbent reaches them')
+    parser.set_defaults(lower_bound=False)
+
+    parser.add_argument('-w', '--workers', type=int, metavar='<n>', default=1,
+                        help='number of lns worker processes sharing the best solution')
+
+    parser.add_argument('-tr', '--trace', type=str, metavar='<file>', default=None,
+                        help='write a json line per lns move to <file> (with multiple workers to <file>.<worker>)')
+
+    parser.add_argument('-so', '--stream', type=str, metavar='<file>', default=None,
+                        help='stream each improving solution to <file> or fifo ("-" for stdout)')
+
+    parser.add_argument('-sf', '--stream-format', type=str, choices=stream.FORMATS, metavar='<arg>',
+                        default=stream.FORMAT_JSON,
+                        help='the format ("json" or "clingo") of the streamed solutions')
+
+    parser.add_argument('-cp', '--checkpoint', type=str, metavar='<file>', default=None,
+                        help='periodically store the incumbent and the state of the search in <file>')
+
+    parser.add_argument('-ci', '--checkpoint-interval', type=int, metavar='<n>', default=60,
+                        help='write a checkpoint at most every <n> seconds')
+
+    group = parser.add_mutually_exclusive_group()
+
+    group.add_argument('-re', '--resume', type=existing_files, metavar='<file>', default=None,
+                       help='resume the search from the incumbent and the search state of a checkpoint')
+
+    group.add_argument('-ws', '--warm-start', type=existing_files, metavar='<file>', default=None,
+                       help='start the search from the solution in <file> (a checkpoint, a json stream or the output of alaspo or clingo)')
    
     args = parser.parse_args()
 
+    if args.workers < 1:
+        parser.error('at least one worker is required')
+
+    if args.workers > 1 and args.interactive:
+        parser.error('interactive mode is not supported with multiple workers')
+
+    if args.workers > 1 and (args.checkpoint is not None or args.resume is not None):
+        parser.error('checkpoints are not supported with multiple workers')
+
+    if args.lower_bound and (args.solver_type != 'clingo' or args.minimize_variable is not None):
+        parser.error('lower bounds are only supported for the minimize statements of clingo')
+
     if args.seed is None:
         seed_value = random.randrange(sys.maxsize)
     else:
@@ -181,39 +322,92 @@ if __name__ == '__main__':
     else:
         program += sys.stdin.read()
 
-    internal_solver = None
-    if args.solver_type == 'clingo':
-        internal_solver = solver.Clingo(options=parsed_options, seed=seed_value, forget_on_shot=args.forget_on_shot)
-    elif args.solver_type == 'clingo-dl':
-        internal_solver = solver.ClingoDl(options=parsed_options, minimize_variable=args.minimize_variable,
-                                          seed=seed_value, forget_on_shot=args.forget_on_shot)
-    elif args.solver_type == 'clingcon':
-        internal_solver = solver.Clingcon(options=parsed_options, seed=seed_value, forget_on_shot=args.forget_on_shot)
-    else:
-        assert False, "Not a valid solver type!"
-
-    initial_operator = initial.ClingoInitialOperator(internal_solver, args.time_limit,
-                                                     pre_opt_time=args.pre_optimize_timeout)
-
-    strat = None
-    relax_operators = None
-    search_operators = None
-
+    portfolio = None
     if args.config_file != None:
         with open(args.config_file, 'r') as f:
-            con = f.read()
-            strat, relax_operators, search_operators = json_config.parse_config(con, internal_solver)
+            portfolio = f.read()
     elif args.quick_config != None:
         conf_string = args.quick_config.split(',')
         op_name = conf_string[0].strip()
         rate = float(conf_string[1].strip())
         mt = int(conf_string[2].strip())
 
-        strat = strategy.RandomStrategy(supports_intensification=True)
-        relax_operators = [ relax.get_operator(op_name, { 'sizes': [ rate ] }) ]
-        search_operators = [ search.get_operator('default', { 'timeouts': [ mt ] }, internal_solver) ]
+        portfolio = json.dumps({
+            'strategy': { 'name': 'random', 'intensification': True },
+            'relaxOperators': [ { 'type': op_name, 'sizes': [ rate ] } ],
+            'searchOperators': [ { 'type': 'default', 'timeouts': [ mt ] } ]
+        })
     else:
-        strat, relax_operators, search_operators = json_config.parse_config(json_config.DEFAULT_CONFIG, internal_solver)
+        portfolio = json_config.DEFAULT_CONFIG
+
+    recycle = None
+    if args.recycle_moves is not None or args.recycle_memory is not None or args.recycle_slowdown is not None:
+        recycle = {
+            'moves': args.recycle_moves,
+            'memory': args.recycle_memory,
+            'slowdown': args.recycle_slowdown
+        }
+
+    resume_state = None
+    warm_start = None
+    if args.resume is not None:
+        resume_state = checkpoint.load_checkpoint(args.resume)
+        warm_start = [ clingo.parse_term(s) for s in resume_state['solution']['model']['shown'] ]
+        logger.info('resuming from checkpoint with cost: ' + str(resume_state['cost']))
+    elif args.warm_start is not None:
+        warm_start = checkpoint.load_solution(args.warm_start)
+
+    solution_stream = None
+    if args.stream is not None:
+        solution_stream = stream.SolutionStream(args.stream, args.stream_format)
+
+    prover = None
+    if args.lower_bound:
+        # the prover has to ground the same instance as the workers, e.g. with the same constants
+        prover = bound.LowerBoundProver(program, parsed_options)
+
+    solver_args = {
+        'options': parsed_options,
+        'minimize_variable': args.minimize_variable,
+        'forget_on_shot': args.forget_on_shot
+    }
+
+    if args.workers > 1:
+        main_parallel(
+            program=program,
+            workers=args.workers,
+            solver_type=args.solver_type,
+            solver_args=solver_args,
+            portfolio=portfolio,
+            seed=seed_value,
+            pre_opt_time=args.pre_optimize_timeout,
+            global_timeout=args.time_limit,
+            core_guided=args.core_guided,
+            recycle=recycle,
+            trace=args.trace,
+            solution_stream=solution_stream,
+            warm_start=warm_start,
+            unsat_memo=args.unsat_memo,
+            pipeline=args.pipeline,
+            prover=prover
+        )
+        sys.exit(0)
+
+    solver_args['seed'] = seed_value
+    internal_solver = solver.get_solver(args.solver_type, solver_args)
+
+    if warm_start is not None:
+        initial_operator = initial.WarmStartInitialOperator(internal_solver, args.time_limit, warm_start,
+                                                            pre_opt_time=args.pre_optimize_timeout)
+    else:
+        initial_operator = initial.ClingoInitialOperator(internal_solver, args.time_limit,
+                                                         pre_opt_time=args.pre_optimize_timeout)
+
+    checkpointer = None
+    if args.checkpoint is not None:
+        checkpointer = checkpoint.Checkpointer(args.checkpoint, args.checkpoint_interval)
+
+    strat, relax_operators, search_operators = json_config.parse_config(portfolio, internal_solver)
 
     # for interactive mode
     interactive = False
@@ -227,5 +421,14 @@ if __name__ == '__main__':
         search_operators=search_operators,
         strat=strat,
         internal_solver=internal_solver,
-        global_timeout=args.time_limit
+        global_timeout=args.time_limit,
+        core_guided=args.core_guided,
+        recycle=recycle,
+        trace=args.trace,
+        solution_stream=solution_stream,
+        checkpointer=checkpointer,
+        resume_state=resume_state,
+        unsat_memo=args.unsat_memo,
+        pipeline=args.pipeline,
+        prover=prover
     )
@@ -0,0 +1,255 @@
+import os
+import sys
+import glob
+import json
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import config
+import tracing
+import json_config
+logger = config.setup_logger('root')
+
+ALASPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alaspo.py')
+DEFAULT_INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'instances')
+
+
+def gap(cost, best):
+    """
+    returns the primal gap of the given cost w.r.t. the best known cost, which is 0 if both are
+    equal, 1 if there is no solution (or the signs differ) and |cost - best| / max(|cost|, |best|) otherwise.
+    for costs with multiple priority levels, the first differing level is compared
+    """
+    if cost is None or best is None:
+        return 1.0
+
+    if isinstance(cost, list):
+        for c, b in zip(cost, best):
+            if c != b:
+                return gap(c, b)
+        return 0.0
+
+    if cost == best:
+        return 0.0
+    if cost * best < 0:
+        return 1.0
+
+    return abs(cost - best) / max(abs(cost), abs(best))
+
+
+def read_trajectory(trace_path):
+    """
+    returns the list of (elapsed, cost) pairs of each improvement recorded in the given trace. if
+    the run used multiple workers, the traces of all workers (<trace>.<worker>) are merged. a run
+    without a trace (e.g. one which crashed before opening it) has an empty trajectory
+    """
+    if os.path.exists(trace_path):
+        paths = [ trace_path ]
+    else:
+        # the log of the run is written next to the traces (see run)
+        paths = sorted(p for p in glob.glob(trace_path + '.[0-9]*') if p[len(trace_path) + 1:].isdigit())
+    if len(paths) == 0:
+        logger.warning('no trace found at ' + trace_path)
+
+    points = []
+    for path in paths:
+        points += [ (r['elapsed'], r['cost']) for r in tracing.read_trace(path) if r['cost'] is not None ]
+    points.sort(key=lambda p: p[0])
+
+    trajectory = []
+    for elapsed, cost in points:
+        if len(trajectory) == 0 or cost < trajectory[-1][1]:
+            trajectory.append((elapsed, cost))
+
+    return trajectory
+
+
+def primal_integral(trajectory, best, horizon):
+    """
+    returns the integral of the primal gap over the time from 0 to the horizon, where the gap is
+    1 until the first solution is found
+    """
+    integral = 0.0
+    last_time = 0.0
+    last_gap = 1.0
+    for elapsed, cost in trajectory:
+        elapsed = min(elapsed, horizon)
+        integral += last_gap * (elapsed - last_time)
+        last_time = elapsed
+        last_gap = gap(cost, best)
+
+    integral += last_gap * (horizon - last_time)
+    return integral
+
+
+def time_to_target(trajectory, best, target_gap):
+    """
+    returns the time the gap first drops to the target gap or None if it is never reached
+    """
+    for elapsed, cost in trajectory:
+        if gap(cost, best) <= target_gap:
+            return elapsed
+
+    return None
+
+
+def run(instance, config_file, seed, time_limit, arguments, trace_path):
+    """
+    runs alaspo on the given instance with the given config file (None for the default portfolio) and
+    seed, the log of the run is written next to the trace
+    """
+    command = [ sys.executable, ALASPO, '-i', instance, '-gt', str(time_limit), '-sd', str(seed), '-tr', trace_path ]
+    if config_file is not None:
+        command += [ '-c', config_file ]
+    command += arguments
+
+    with open(trace_path + '.log', 'w') as log:
+        try:
+            subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, timeout=time_limit * 2 + 60)
+        except subprocess.TimeoutExpired:
+            logger.warning('run of %s on %s with seed %i did not terminate' % (config_file, instance, seed))
+
+
+def strategy_name(config_file):
+    if config_file is None:
+        portfolio = json_config.DEFAULT_CONFIG
+    else:
+        with open(config_file, 'r') as f:
+            portfolio = f.read()
+
+    strat = json.loads(portfolio)['strategy']
+    return strat['name'] if isinstance(strat, dict) else strat
+
+
+def evaluate(runs, time_limit, target_gap, reference):
+    """
+    computes the metrics of each run given as a dict with the keys config, instance, seed and trajectory.
+    the best known cost of an instance is the best cost of any run or of the reference
+    """
+    best = dict(reference)
+    for r in runs:
+        if len(r['trajectory']) > 0:
+            cost = r['trajectory'][-1][1]
+            if r['instance'] not in best or cost < best[r['instance']]:
+                best[r['instance']] = cost
+
+    for r in runs:
+        instance_best = best.get(r['instance'])
+        final_cost = r['trajectory'][-1][1] if len(r['trajectory']) > 0 else None
+        r['finalCost'] = final_cost
+        r['bestKnown'] = instance_best
+        r['primalIntegral'] = primal_integral(r['trajectory'], instance_best, time_limit)
+        r['timeToTarget'] = time_to_target(r['trajectory'], instance_best, target_gap)
+        r['finalGap'] = gap(final_cost, instance_best)
+
+    return runs
+
+
+def summarize(runs, configs):
+    """
+    returns the metrics of each configuration averaged over all its runs
+    """
+    summary = []
+    for label, config_file in configs:
+        config_runs = [ r for r in runs if r['config'] == label ]
+        reached = [ r['timeToTarget'] for r in config_runs if r['timeToTarget'] is not None ]
+        n = len(config_runs)
+        summary.append({
+            'config': label,
+            'strategy': strategy_name(config_file),
+            'runs': n,
+            'primalIntegral': sum(r['primalIntegral'] for r in config_runs) / n,
+            'finalGap': sum(r['finalGap'] for r in config_runs) / n,
+            'targetReached': len(reached),
+            'timeToTarget': sum(reached) / len(reached) if len(reached) > 0 else None
+        })
+
+    return summary
+
+
+def print_summary(summary):
+    print('%-24s %-12s %5s %12s %10s %8s %12s' % ('config', 'strategy', 'runs', 'primal int.', 'final gap',
+                                                 'target', 'time to tgt.'))
+    for s in summary:
+        ttt = '-' if s['timeToTarget'] is None else '%.2f' % s['timeToTarget']
+        print('%-24s %-12s %5i %12.3f %10.4f %4i/%-3i %12s' % (s['config'], s['strategy'], s['runs'], s['primalIntegral'],
+                                                           s['finalGap'], s['targetReached'], s['runs'], ttt))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                     description='Benchmark of ALASPO configurations')
+
+    parser.add_argument('-i', '--instances', type=str, metavar='file', nargs='+', default=None,
+                        help='input ASP files (default: the bundled instances in benchmarks/instances)')
+
+    parser.add_argument('-c', '--config-files', type=str, metavar='<file>', nargs='+', default=None,
+                        help='the portfolio config files to compare (default: the default portfolio)')
+
+    parser.add_argument('-s', '--seeds', type=int, metavar='<n>', default=3,
+                        help='number of seeds per instance and config')
+
+    parser.add_argument('-gt', '--time-limit', type=int, metavar='<n>', default=30,
+                        help='time limit of each run')
+
+    parser.add_argument('-j', '--jobs', type=int, metavar='<n>', default=os.cpu_count(),
+                        help='number of runs executed in parallel')
+
+    parser.add_argument('-a', '--alaspo-arguments', type=str, metavar='<args>', default='',
+                        help='additional arguments passed to every alaspo run (separated by space)')
+
+    parser.add_argument('-tg', '--target-gap', type=float, metavar='<f>', default=0.0,
+                        help='the gap to the best known cost a run has to reach for the time-to-target')
+
+    parser.add_argument('-r', '--reference', type=str, metavar='<file>', default=None,
+                        help='json file mapping instance file names to known (e.g. optimal) costs')
+
+    parser.add_argument('-o', '--output', type=str, metavar='<dir>', default='benchmark-results',
+                        help='directory for the traces, logs and results')
+
+    args = parser.parse_args()
+
+    instances = args.instances
+    if instances is None:
+        instances = sorted(glob.glob(os.path.join(DEFAULT_INSTANCES, '*.lp')))
+
+    configs = [ ('default', None) ]
+    if args.config_files is not None:
+        configs = [ (os.path.splitext(os.path.basename(c))[0], c) for c in args.config_files ]
+
+    reference = {}
+    if args.reference is not None:
+        with open(args.reference, 'r') as f:
+            reference = json.load(f)
+
+    arguments = args.alaspo_arguments.split(' ') if args.alaspo_arguments else []
+
+    runs = []
+    for label, config_file in configs:
+        os.makedirs(os.path.join(args.output, label), exist_ok=True)
+        for instance in instances:
+            for seed in range(1, args.seeds + 1):
+                name = os.path.basename(instance)
+                trace_path = os.path.join(args.output, label, '%s.%i.jsonl' % (name, seed))
+                runs.append({ 'config': label, 'configFile': config_file, 'instance': name, 'path': instance,
+                              'seed': seed, 'trace': trace_path })
+
+    logger.info('running %i runs with %i jobs' % (len(runs), args.jobs))
+
+    def execute(r):
+        run(r['path'], r['configFile'], r['seed'], args.time_limit, arguments, r['trace'])
+        r['trajectory'] = read_trajectory(r['trace'])
+        logger.info('finished %s on %s with seed %i' % (r['config'], r['instance'], r['seed']))
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        list(executor.map(execute, runs))
+
+    runs = evaluate(runs, args.time_limit, args.target_gap, reference)
+    summary = summarize(runs, configs)
+
+    with open(os.path.join(args.output, 'results.json'), 'w') as f:
+        json.dump({ 'timeLimit': args.time_limit, 'targetGap': args.target_gap, 'summary': summary, 'runs': runs },
+                  f, indent=2)
+
+    print_summary(summary)
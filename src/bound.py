@@ -0,0 +1,135 @@
+import argparse
+import multiprocessing
+import queue
+import signal
+import logging
+import clingo
+logger = logging.getLogger('root')
+
+
+def optimality_gap(cost, lower):
+    """
+    returns the gap between the cost of a solution and a lower bound, i.e. (cost - lower) / |cost|
+    (0 if both are equal). for costs with multiple priority levels, the first differing level is compared
+    """
+    if isinstance(cost, list):
+        for c, l in zip(cost, lower):
+            if c != l:
+                return optimality_gap(c, l)
+        return 0.0
+
+    if cost == lower:
+        return 0.0
+
+    return (cost - lower) / max(abs(cost), 1)
+
+
+def is_proven(cost, lower):
+    """
+    whether or not the given cost is proven optimal by the given lower bound
+    """
+    return cost is not None and lower is not None and cost <= lower
+
+
+# the options of the prover, which must not be overridden by the ones of the solver
+PROVER_OPTIONS = [ '--opt-strategy', '--opt-mode' ]
+
+
+def prover_options(options):
+    """
+    returns the given clingo options (e.g. the ones of the LNS solver) without the ones of the prover (see PROVER_OPTIONS),
+    hence the prover grounds the same instance, e.g. with the same constants
+    """
+    filtered = []
+    skip = False
+    for option in options or []:
+        if skip:
+            skip = False
+        elif option in PROVER_OPTIONS:
+            # the value is given as the next argument
+            skip = True
+        elif option and not any(option.startswith(o + '=') for o in PROVER_OPTIONS):
+            filtered.append(option)
+
+    return filtered
+
+
+def run_prover(program, options, outbox):
+    """
+    entry point of the prover process: optimizes the program with the core guided strategy of clasp
+    and sends each improved lower bound. once the search is exhausted, the cost of its last model is
+    the optimum and sent as the final bound
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    ctl = clingo.Control([ '--opt-strategy=usc', '--opt-mode=opt' ] + options)
+    ctl.add('base', [], program)
+    ctl.ground([('base', [])])
+
+    costs = argparse.Namespace(last=None)
+
+    def on_model(model):
+        costs.last = list(model.cost)
+
+    result = ctl.solve(on_unsat=lambda lower: outbox.put(('bound', list(lower))), on_model=on_model)
+    if result.exhausted and costs.last is not None:
+        outbox.put(('bound', costs.last))
+
+
+class LowerBoundProver:
+
+    def __init__(self, program, options=None):
+        """
+        proves lower bounds of the cost of the program in a separate process, which runs clingo with
+        core guided optimization (--opt-strategy=usc) and the given additional options (see prover_options). 
+        only supported for programs whose cost is given by minimize statements
+        """
+        self.__program = program
+        self.__options = prover_options(options)
+        self.__process = None
+        self.__outbox = None
+
+        self.lower_bound = None
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self.__outbox = context.Queue()
+        self.__process = context.Process(target=run_prover, args=(self.__program, self.__options, self.__outbox),
+                                         daemon=True)
+        self.__process.start()
+        logger.info('started lower bound prover')
+
+    def poll(self):
+        """
+        returns the best lower bound received so far (None if there is none yet)
+        """
+        if self.__outbox is None:
+            return self.lower_bound
+
+        while True:
+            try:
+                kind, data = self.__outbox.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'bound':
+                # costs of a single priority level are numbers (see solver.Clingo._read_cost)
+                self.lower_bound = data[0] if len(data) == 1 else data
+                logger.debug('lower bound: ' + str(data))
+
+        return self.lower_bound
+
+    def report(self, cost):
+        """
+        logs the gap between the given cost and the best lower bound
+        """
+        lower = self.poll()
+        if cost is not None and lower is not None:
+            logger.info('lower bound: %s, gap: %.2f%%' % (lower, 100 * optimality_gap(cost, lower)))
+
+    def stop(self):
+        if self.__process is not None:
+            if self.__process.is_alive():
+                self.__process.terminate()
+            self.__process.join()
+            self.__process = None
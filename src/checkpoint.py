@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import random
+import clingo
+import logging
+logger = logging.getLogger('root')
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpointer:
+
+    def __init__(self, path, interval=60):
+        """
+        periodically writes the incumbent, its cost (the bound of the search), the state of the strategy
+        and the state of the random number generator to the given file (at most once per interval in seconds)
+        """
+        self.__path = path
+        self.__interval = interval
+        self.__last_save = None
+
+    def update(self, internal_solver, incumbent, strategy, force=False):
+        """
+        called after each move, writes a checkpoint if the interval elapsed since the last one or if forced
+        """
+        now = time.time()
+        if not force and self.__last_save is not None and now - self.__last_save < self.__interval:
+            return
+
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'time': now,
+            'cost': incumbent.cost,
+            'bound': incumbent.cost,
+            'solution': internal_solver.export_solution(incumbent),
+            'strategy': strategy.get_state(),
+            'random': random.getstate()
+        }
+
+        write_atomically(self.__path, json.dumps(state))
+        self.__last_save = now
+        logger.debug('written checkpoint with cost %s to %s' % (incumbent.cost, self.__path))
+
+
+def write_atomically(path, content):
+    """
+    writes the content to a temporary file next to the given path and renames it, hence the file at the
+    given path is either the previous or the new version, even if the process is killed
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """
+    returns the state stored in the given checkpoint file
+    """
+    with open(path, 'r') as f:
+        state = json.load(f)
+
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError('unsupported checkpoint version in "%s"' % path)
+
+    return state
+
+
+def restore(state, strategy):
+    """
+    restores the strategy (which has to be prepared with the same portfolio) and the random state of a checkpoint
+    """
+    strategy.set_state(state['strategy'])
+
+    version, internal_state, gauss_next = state['random']
+    random.setstate((version, tuple(internal_state), gauss_next))
+
+
+def load_solution(path):
+    """
+    returns the shown atoms of the solution stored in the given file, which is either a checkpoint,
+    a stream of json lines (see stream.SolutionStream) or text in the output format of clingo or alaspo.
+    of a stream or an output with multiple solutions, the last one is returned
+    """
+    with open(path, 'r') as f:
+        content = f.read()
+
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = None
+
+    if isinstance(data, dict) and 'solution' in data:
+        atoms = data['solution']['model']['shown']
+    else:
+        atoms = None
+        # blank lines are kept, as a solution without shown atoms is printed as one
+        lines = [ line.strip() for line in content.splitlines() ]
+        for i, line in enumerate(lines):
+            if line.startswith('{'):
+                atoms = json.loads(line)['atoms']
+            elif line.startswith('Answer:'):
+                atoms = []
+                if i + 1 < len(lines) and not lines[i + 1].startswith(('Optimization:', 'Costs:')):
+                    atoms = lines[i + 1].split()
+            elif line.startswith('Costs:') and i > 0:
+                atoms = lines[i - 1].split()
+
+    if atoms is None:
+        raise ValueError('no solution found in "%s"' % path)
+
+    return [ clingo.parse_term(a) for a in atoms ]
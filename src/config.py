@@ -4,6 +4,13 @@ import logging
 SELECT_PRED = "_lns_select"
 FIX_PRED = "_lns_fix"
 
+# model capture policies, ordered from the cheapest to the most complete one
+CAPTURE_SHOWN = "shown"
+CAPTURE_PROJECTION = "projection"
+CAPTURE_DECLARATIVE = "declarative"
+CAPTURE_FULL = "full"
+CAPTURE_POLICIES = [ CAPTURE_SHOWN, CAPTURE_PROJECTION, CAPTURE_DECLARATIVE, CAPTURE_FULL ]
+
 def setup_logger(name):
     formatter = logging.Formatter(fmt='%(asctime)s - %(levelname)s - %(module)s - %(message)s')
 
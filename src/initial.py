@@ -17,4 +17,41 @@ class ClingoInitialOperator:
             return self.__internal_solver.solve(timelimit=min(self.__pre_opt_time, self.__timeout))
         else:
             return self.__internal_solver.solve(timelimit=self.__timeout, modellimit=1)
-      
\ No newline at end of file
+      
+
+class WarmStartInitialOperator(ClingoInitialOperator):
+
+    def __init__(self, internal_solver, global_timeout, atoms, pre_opt_time=0):
+        """
+        starts from a stored solution given by its shown atoms (see checkpoint.load_solution) instead of 
+        constructing one. if the atoms do not extend to a solution, the default construction is used
+        """
+        super().__init__(internal_solver, global_timeout, pre_opt_time=pre_opt_time)
+        self.__timeout = global_timeout
+        self.__internal_solver = internal_solver
+        self.__atoms = atoms
+
+    def construct(self):
+        logger.debug(f'warm start from a solution with {len(self.__atoms)} atoms')
+        assumptions = self.__internal_solver.literals(self.__atoms)
+        solution = self.__internal_solver.solve(assumptions=assumptions, timelimit=self.__timeout, modellimit=1)
+        if solution.sat:
+            return solution
+
+        logger.warning('stored solution could not be restored, constructing a new one')
+        return super().construct()
+
+
+class IncumbentInitialOperator(ClingoInitialOperator):
+
+    def __init__(self, internal_solver, global_timeout, solution):
+        """
+        starts from a solution found before by the same internal solver, whose bound excludes it already
+        (e.g. by a resident solver of server.SolverPool)
+        """
+        super().__init__(internal_solver, global_timeout)
+        self.__solution = solution
+
+    def construct(self):
+        logger.debug('continuing from the incumbent with cost %s' % str(self.__solution.cost))
+        return self.__solution
@@ -36,6 +36,9 @@ def parse_config(config, internal_solver):
     json_config = json.loads(config)
 
     json_strategy = json_config['strategy']
+    # a strategy without arguments may be given by its name only
+    if isinstance(json_strategy, str):
+        json_strategy = { 'name': json_strategy }
     strat_name = json_strategy['name']
     strat_args = { k:v for k,v in json_strategy.items() if k != 'name' }
 
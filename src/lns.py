@@ -1,17 +1,246 @@
+import os
 import time
+import random
 import signal
+import resource
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import initial
+import config
+import tracing
+import bound
 import logging
 logger = logging.getLogger('root')
 
+
+def resident_memory():
+    """
+    returns the resident memory of the process in MB
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # peak instead of current memory (in KB on linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RecyclePolicy:
+
+    def __init__(self, moves=None, memory=None, slowdown=None, window=20):
+        """
+        decides when the internal solver is recycled (see solver.Clingo.recycle). a recycle is triggered
+        after the given number of moves, once the resident memory exceeds the given number of MB or once 
+        the mean duration of the last window finished (i.e. not timed out) moves exceeds the one measured 
+        after the last recycle by the given factor
+        """
+        self.__moves = moves
+        self.__memory = memory
+        self.__slowdown = slowdown
+        self.__window = window
+        self.reset()
+
+    def reset(self):
+        """
+        resets the counters, called after each recycle
+        """
+        self.__move_count = 0
+        self.__durations = deque(maxlen=self.__window)
+        self.__baseline = None
+
+    def should_recycle(self, duration, timed_out):
+        """
+        called after each move, returns whether or not the solver should be recycled
+        """
+        self.__move_count += 1
+        if self.__moves is not None and self.__move_count >= self.__moves:
+            logger.debug('recycle triggered by move count')
+            return True
+
+        if self.__memory is not None and resident_memory() > self.__memory:
+            logger.debug('recycle triggered by memory usage')
+            return True
+
+        if self.__slowdown is not None and not timed_out:
+            self.__durations.append(duration)
+            if len(self.__durations) == self.__window:
+                mean = sum(self.__durations) / self.__window
+                if self.__baseline is None:
+                    self.__baseline = mean
+                elif mean > self.__baseline * self.__slowdown:
+                    logger.debug('recycle triggered by slowdown')
+                    return True
+
+        return False
+
+
+class UnsatMemo:
+
+    def __init__(self, capacity=64, retries=10):
+        """
+        remembers the assumption sets (or their unsatisfiable cores) of the last capacity moves which are 
+        unsatisfiable under the current bound, a move is known to fail if its assumptions contain one of them.
+        a known failing move is redrawn at most retries times. the memo has to be cleared whenever the bound 
+        or the literals change, i.e. if the incumbent improves or the solver is recycled
+        """
+        self.__capacity = capacity
+        self.__retries = retries
+        self.__sets = OrderedDict()
+        self.hits = 0
+
+    def clear(self):
+        self.__sets.clear()
+
+    def add(self, assumptions, core=None):
+        """
+        records an unsatisfiable move given by its assumptions and the optional literals of its core
+        """
+        key = frozenset(core if core else assumptions)
+        self.__sets[key] = None
+        self.__sets.move_to_end(key)
+        while len(self.__sets) > self.__capacity:
+            self.__sets.popitem(last=False)
+
+    def known_unsat(self, assumptions):
+        """
+        returns whether or not the move with the given assumptions is known to be unsatisfiable
+        """
+        if len(self.__sets) == 0:
+            return False
+
+        assumptions = frozenset(assumptions)
+        for key in self.__sets:
+            if key <= assumptions:
+                self.__sets.move_to_end(key)
+                self.hits += 1
+                return True
+
+        return False
+
+    def redraw(self, relax_operator, incumbent, assumptions, rng=random):
+        """
+        returns the given assumptions or, if they are known to be unsatisfiable, new ones of the relax operator
+        drawn with the given random number generator
+        """
+        retries = 0
+        while retries < self.__retries and self.known_unsat(assumptions):
+            assumptions = relax_operator.get_move_assumptions(incumbent, rng)
+            retries += 1
+
+        if retries > 0:
+            logger.debug('redrew %i moves known to be unsatisfiable' % retries)
+
+        return assumptions
+
+
+class RelaxPrefetcher:
+
+    def __init__(self):
+        """
+        computes the assumptions of the next move on a background thread while the current move is solved.
+        the relaxation is speculative: it is computed for the relax operator predicted by the strategy 
+        (see strategy.AbstractStrategy.predict) and the current incumbent, and it is discarded unless
+        the next move uses the same operator with the same size on the same incumbent
+        """
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__future = None
+        self.__key = None
+        self.__assumptions = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, relax_operator, incumbent, rng=random):
+        """
+        starts the relaxation of the given operator for the given incumbent, its generator is seeded from the given one
+        """
+        self.__key = None
+        self.__assumptions = None
+
+        # soft operators add guides to the program, which is not possible while solving
+        if relax_operator is None or relax_operator.is_soft():
+            return
+
+        # the indices are built before solving, the background thread only reads them and never
+        # interns symbols in the atom table, which is done by the model callback of the solver
+        relax_operator.build_indices(incumbent)
+
+        # the generator is seeded by the main thread, hence the search stays reproducible
+        rng = random.Random(rng.getrandbits(64))
+        self.__key = (relax_operator, relax_operator.get_size_index(), incumbent.model)
+        self.__future = self.__executor.submit(relax_operator.get_move_assumptions, incumbent, rng)
+
+    def finish(self):
+        """
+        waits for the pending relaxation, called as soon as the move is solved
+        """
+        if self.__future is None:
+            return
+
+        try:
+            self.__assumptions = self.__future.result()
+        except Exception as e:
+            logger.debug('speculative relaxation failed: ' + str(e))
+            self.__assumptions = None
+        self.__future = None
+
+    def take(self, relax_operator, incumbent):
+        """
+        returns the prefetched assumptions if they were computed for the given operator in its current size and the given
+        incumbent and None otherwise
+        """
+        key = self.__key
+        assumptions = self.__assumptions
+        self.__key = None
+        self.__assumptions = None
+
+        if assumptions is not None and key == (relax_operator, relax_operator.get_size_index(), incumbent.model):
+            self.hits += 1
+            return assumptions
+
+        if key is not None:
+            self.misses += 1
+        return None
+
+    def close(self):
+        self.finish()
+        self.__executor.shutdown()
+
+
 class ClingoLNS:
     
-    def __init__(self, internal_solver, program, initial_operator, relax_operators, search_operators, strategy):
+    def __init__(self, internal_solver, program, initial_operator, relax_operators, search_operators, strategy,
+                 exchange=None, core_guided=False, recycle_policy=None, tracer=None, stream=None, checkpointer=None,
+                 unsat_memo=None, pipeline=False, prover=None, clock=time.time, rng=random):
         """
-        instantiated the VLNS solver with required relax operators and the optional move timeout in seconds (default 5)
+        instantiated the VLNS solver with required relax operators and the optional move timeout in seconds (default 5).
+        the optional exchange shares incumbents with other solvers (see parallel.WorkerExchange).
+        if core guided, the atoms of the unsatisfiable core of a failed move are relaxed in the next move.
+        the optional recycle policy decides when the internal solver is rebuilt (see RecyclePolicy).
+        the optional tracer records each move (see tracing.MoveTracer) and the optional stream
+        receives each improving solution (see stream.SolutionStream). the optional checkpointer periodically 
+        stores the state of the search (see checkpoint.Checkpointer) and the optional unsat memo avoids moves 
+        already known to be unsatisfiable (see UnsatMemo). if pipelined, the relaxation of the next move is 
+        computed while the current move is solved (see RelaxPrefetcher). the optional prover runs concurrently
+        and the search stops as soon as the cost of the incumbent reaches its lower bound (see bound.LowerBoundProver).
+        the time limit and the durations of moves are measured by the given clock (e.g. the virtual one of simulate.ReplaySolver).
+        all random decisions of the search are drawn with the given random number generator (default the random module).
+        if the program is None, the internal solver has to be grounded already (e.g. a resident one of server.SolverPool)
         """
         self.__internal_solver = internal_solver
         self.__program = program
+        self.__exchange = exchange
+        self.__core_guided = core_guided
+        self.__recycle_policy = recycle_policy
+        self.__tracer = tracer
+        self.__stream = stream
+        self.__checkpointer = checkpointer
+        self.__unsat_memo = unsat_memo
+        self.__pipeline = pipeline
+        self.__prover = prover
+        self.__reported = None
+        self.__clock = clock
+        self.__rng = rng
         self._unsat_count = 0
         self._timeout_count = 0
 
@@ -26,9 +255,23 @@ class ClingoLNS:
         self.relax_operator = None
         self.search_operator = None
 
-        self.__strategy.prepare(relax_operators, search_operators)
+        self.__strategy.prepare(relax_operators, search_operators, rng)
+
+        # only copy the parts of each model which are read by the relax operators
+        policy = max([ op.capture_policy() for op in relax_operators ], key=config.CAPTURE_POLICIES.index)
+        self.__internal_solver.set_capture_policy(policy)
+
+        if any(op.is_soft() for op in relax_operators):
+            self.__internal_solver.enable_guidance()
+
+        if any(op.requires_costs() for op in relax_operators):
+            self.__internal_solver.enable_cost_observer()
+
+        if any(op.requires_graph() for op in relax_operators):
+            self.__internal_solver.enable_dependency_graph()
 
         self.best_solution = None
+        self.optimal = False
 
     def get_portfolio(self):
         """
@@ -37,34 +280,95 @@ class ClingoLNS:
 
         return self.__strategy.get_portfolio()
 
+    def __trace_move(self, prev_cost, solution, incumbent, relax_time, assumption_count, solve_time):
+        if solution.sat:
+            outcome = tracing.OUTCOME_IMPROVED if solution.cost < prev_cost else tracing.OUTCOME_SAT
+        elif solution.sat is False or solution.exhausted:
+            outcome = tracing.OUTCOME_UNSAT
+        else:
+            outcome = tracing.OUTCOME_TIMEOUT
+
+        self.__tracer.record(self.__internal_solver, outcome, incumbent.cost,
+                             relaxOperator=self.relax_operator.name(), searchOperator=self.search_operator.name(),
+                             relaxSize=self.relax_operator.get_size(), searchSize=self.search_operator.get_size(),
+                             relaxTime=relax_time, assumptions=assumption_count, solveTime=solve_time)
+
+    def __reaches_bound(self, incumbent):
+        """
+        returns whether or not the incumbent is proven optimal by the lower bound of the prover and reports the
+        gap whenever the cost or the bound changes
+        """
+        if self.__prover is None:
+            return False
+
+        lower = self.__prover.poll()
+        if (incumbent.cost, lower) != self.__reported:
+            self.__reported = (incumbent.cost, lower)
+            self.__prover.report(incumbent.cost)
+
+        return bound.is_proven(incumbent.cost, lower)
+
+    def __save_checkpoint(self, incumbent, force=False):
+        if self.__checkpointer is not None:
+            self.__checkpointer.update(self.__internal_solver, incumbent, self.__strategy, force=force)
+
     def solve(self, timeout):
         """
         runs the VLNS algorithm on the given ASP instance for the given timelimit
         """
+        prefetcher = RelaxPrefetcher() if self.__pipeline else None
+        if self.__prover is not None:
+            self.__reported = None
+            self.__prover.start()
+        try:
+            return self.__solve(timeout, prefetcher)
+        finally:
+            if self.__prover is not None:
+                self.__prover.stop()
+            if prefetcher is not None:
+                prefetcher.close()
+                logger.debug('used %i of %i speculative relaxations' % (prefetcher.hits, prefetcher.hits + prefetcher.misses))
+
+    def __solve(self, timeout, prefetcher):
+        clock = self.__clock
 
         self._unsat_count = 0
         self._timeout_count = 0
+        self.optimal = False
 
-        start_time = time.time()
-        time_left = lambda: timeout - (time.time() - start_time)
+        start_time = clock()
+        time_left = lambda: timeout - (clock() - start_time)
 
         # get internal solver
         internal_solver = self.__internal_solver
 
-        # load clear and program
-        internal_solver.load_string(self.__program)
+        if self.__program is not None:
+            # load clear and program
+            internal_solver.load_string(self.__program)
 
-        # ground base
-        internal_solver.ground()
+            # ground base
+            internal_solver.ground()
+
+        for op in self.__strategy.get_portfolio()[0]:
+            if op.get_projection() is not None:
+                internal_solver.add_projection(op.get_projection())
 
         incumbent = None
 
+        memo = self.__unsat_memo
+        if memo is not None:
+            memo.clear()
+
+        tracer = self.__tracer
+        if tracer is not None:
+            tracer.start(internal_solver)
+
         # obtain initial solution
         solution = self.__initial_operator.construct()
 
         if not isinstance(self.__initial_operator, initial.ClingoInitialOperator):
             # non default init operator was used, hence we seed the solver with the greedy solution 
-            internal_solver.solve(assumptions=solution.model.symbols)
+            internal_solver.solve(assumptions=internal_solver.literals(solution.model.symbols))
 
         if solution is None or not solution.sat:
             logger.info('COULD NOT FIND INITIAL SOLUTION')
@@ -72,27 +376,74 @@ class ClingoLNS:
 
         logger.info('initial cost: ' + str(solution.cost))
 
+        if tracer is not None:
+            tracer.record(internal_solver, tracing.OUTCOME_INITIAL, solution.cost, exhausted=solution.exhausted)
+
         incumbent = solution
 
         self.best_solution = incumbent
 
-        if solution.exhausted:
+        if self.__exchange is not None:
+            self.__exchange.publish(incumbent)
+        if self.__stream is not None:
+            self.__stream.publish(incumbent)
+
+        if solution.exhausted or self.__reaches_bound(incumbent):
             logger.info('OPTIMAL SOLUTION FOUND')
+            self.optimal = True
+            self.__save_checkpoint(incumbent, force=True)
             return incumbent
 
+        self.__save_checkpoint(incumbent)
 
         # LNS loop
         assumptions = None
+        core = None
         while time_left() > 0:
-            move_start_time = time.time()
+            move_start_time = clock()
+
+            if self.__exchange is not None:
+                shared = self.__exchange.receive()
+                if shared is not None and shared.cost < incumbent.cost:
+                    # continue from the globally best solution
+                    incumbent = shared
+                    logger.info('continuing from shared solution with cost: ' + str(incumbent.cost))
+                    self.best_solution = incumbent
+                    if self.__stream is not None:
+                        self.__stream.publish(incumbent)
+                    internal_solver.set_bound(incumbent.cost)
+                    assumptions = None
+                    core = None
+                    if memo is not None:
+                        memo.clear()
             
             # get assumptions
+            relax_time = 0
             if assumptions is None or not self.__strategy.supports_intensification():
+                relax_start_time = clock()
                 self.relax_operator, self.search_operator = self.__strategy.select_operators()
                 logger.debug('selected relax operator %s and search operator %s' % (self.relax_operator.name(), self.search_operator.name()))
-                assumptions = self.relax_operator.get_move_assumptions(incumbent)
+                assumptions = None
+                if prefetcher is not None:
+                    assumptions = prefetcher.take(self.relax_operator, incumbent)
+                if assumptions is None:
+                    assumptions = self.relax_operator.get_move_assumptions(incumbent, self.__rng)
+                if memo is not None:
+                    assumptions = memo.redraw(self.relax_operator, incumbent, assumptions, self.__rng)
+                if core:
+                    assumptions = self.relax_operator.relax_core(assumptions, core)
+                    logger.debug('relaxed %i core atoms of the previous move' % len(core))
+                    core = None
+                relax_time = clock() - relax_start_time
             # perform move
-            solution = self.search_operator.execute(assumptions, time_left())
+            solve_start_time = clock()
+            assumption_count = len(assumptions)
+            if prefetcher is not None:
+                prefetcher.start(self.__strategy.predict(), incumbent, self.__rng)
+            solution = self.search_operator.execute(assumptions, time_left(), self.__rng)
+            if prefetcher is not None:
+                prefetcher.finish()
+            solve_time = clock() - solve_start_time
 
             prev_cost = incumbent.cost
             if solution.sat:
@@ -100,30 +451,78 @@ class ClingoLNS:
                 incumbent = solution
                 logger.info('found solution with cost: ' + str(incumbent.cost))
                 self.best_solution = incumbent
+                if self.__exchange is not None and solution.cost < prev_cost:
+                    self.__exchange.publish(incumbent)
+                if self.__stream is not None and solution.cost < prev_cost:
+                    self.__stream.publish(incumbent)
                 if prev_cost == solution.cost:
                     assumptions = None
+                elif memo is not None:
+                    memo.clear()
                 self._unsat_count = 0
                 self._timeout_count = 0
+                core = None
             else:
                 # unsat or timeout, do not change incumbent and reset assumptions
                 if solution.sat is False or solution.exhausted:
                     self._timeout_count = 0
-                    if len(assumptions) == 0:
+                    # an empty core means the move is unsatisfiable regardless of the assumptions
+                    if len(assumptions) == 0 or solution.core == []:
                         logger.info('OPTIMAL SOLUTION FOUND')
+                        self.optimal = True
+                        if tracer is not None:
+                            self.__trace_move(prev_cost, solution, incumbent, relax_time, assumption_count, solve_time)
+                        self.__save_checkpoint(incumbent, force=True)
                         return incumbent
                     else:
                         logger.debug('unsat/optimal under current assumptions')
                         self._unsat_count += 1
+                        if (self.__core_guided or memo is not None) and solution.core:
+                            core = internal_solver.core_atoms(solution.core, assumptions)
+                        if memo is not None:
+                            memo.add(assumptions, core)
+                        if not self.__core_guided:
+                            core = None
                 else:
                     logger.debug('move timed out')
                     self._unsat_count = 0
                     self._timeout_count += 1
                 assumptions = None
 
-            move_end_time = time.time()
+            move_end_time = clock()
             operators = (self.relax_operator, self.search_operator)
             self.__strategy.on_move_finished(operators, prev_cost, solution, move_end_time - move_start_time)
 
+            if tracer is not None:
+                self.__trace_move(prev_cost, solution, incumbent, relax_time, assumption_count, solve_time)
+
+            if self.__recycle_policy is not None:
+                timed_out = solution.sat is None and not solution.exhausted
+                if self.__recycle_policy.should_recycle(move_end_time - move_start_time, timed_out):
+                    recycle_start_time = clock()
+                    internal_solver.recycle()
+                    self.__recycle_policy.reset()
+                    # the literals of the former control are not valid anymore
+                    incumbent = internal_solver.relink_solution(incumbent)
+                    self.best_solution = incumbent
+                    assumptions = None
+                    core = None
+                    if memo is not None:
+                        memo.clear()
+                    logger.info('recycled solver in %.2f seconds' % (clock() - recycle_start_time))
+
+            if self.__reaches_bound(incumbent):
+                logger.info('OPTIMAL SOLUTION FOUND (lower bound reached)')
+                self.optimal = True
+                self.__save_checkpoint(incumbent, force=True)
+                return incumbent
+
+            self.__save_checkpoint(incumbent)
+
+        if memo is not None:
+            logger.debug('avoided %i moves known to be unsatisfiable' % memo.hits)
+
+        self.__save_checkpoint(incumbent, force=True)
         return incumbent
 
 
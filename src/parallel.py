@@ -0,0 +1,235 @@
+import multiprocessing
+import queue
+import random
+import signal
+import sys
+import time
+import logging
+import clingo
+
+import config
+import initial
+import json_config
+import lns
+import bound
+import solver
+import tracing
+logger = logging.getLogger('root')
+
+
+class WorkerExchange:
+    """
+    exchanges the incumbents of a worker with the coordinator of a parallel portfolio.
+    solutions are transferred in the pickleable form of Clingo.export_solution
+    """
+
+    def __init__(self, worker_id, internal_solver, outbox, inbox):
+        self.__worker_id = worker_id
+        self.__internal_solver = internal_solver
+        self.__outbox = outbox
+        self.__inbox = inbox
+
+    def publish(self, solution):
+        """
+        sends an improving solution of the worker to the coordinator
+        """
+        self.__outbox.put(('solution', self.__worker_id, self.__internal_solver.export_solution(solution)))
+
+    def receive(self):
+        """
+        returns the latest global best solution sent by the coordinator or None if there is no new one
+        """
+        data = None
+        while True:
+            try:
+                data = self.__inbox.get_nowait()
+            except queue.Empty:
+                break
+
+        if data is None:
+            return None
+
+        return self.__internal_solver.import_solution(data)
+
+
+def run_worker(worker_id, setup, outbox, inbox):
+    """
+    entry point of a worker process: grounds its own solver and runs the lns loop until the deadline
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if not logging.getLogger('root').handlers:
+        config.setup_logger('root')
+
+    optimal = False
+    tracer = None
+    try:
+        random.seed(setup['seed'])
+
+        solver_args = dict(setup['solverArgs'])
+        solver_args['seed'] = setup['seed']
+        internal_solver = solver.get_solver(setup['solverType'], solver_args)
+
+        timeout = setup['deadline'] - time.time()
+        strat, relax_operators, search_operators = json_config.parse_config(setup['portfolio'], internal_solver)
+        if setup['warmStart'] is not None:
+            atoms = [ clingo.parse_term(s) for s in setup['warmStart'] ]
+            initial_operator = initial.WarmStartInitialOperator(internal_solver, timeout, atoms,
+                                                                pre_opt_time=setup['preOptTime'])
+        else:
+            initial_operator = initial.ClingoInitialOperator(internal_solver, timeout, pre_opt_time=setup['preOptTime'])
+        exchange = WorkerExchange(worker_id, internal_solver, outbox, inbox)
+
+        recycle_policy = None
+        if setup['recycle'] is not None:
+            recycle_policy = lns.RecyclePolicy(**setup['recycle'])
+
+        unsat_memo = None
+        if setup['unsatMemo'] is not None:
+            unsat_memo = lns.UnsatMemo(setup['unsatMemo'])
+
+        if setup['trace'] is not None:
+            tracer = tracing.MoveTracer('%s.%i' % (setup['trace'], worker_id))
+
+        lns_solver = lns.ClingoLNS(internal_solver, setup['program'], initial_operator, relax_operators,
+                                   search_operators, strat, exchange=exchange, core_guided=setup['coreGuided'],
+                                   recycle_policy=recycle_policy, tracer=tracer, unsat_memo=unsat_memo,
+                                   pipeline=setup['pipeline'])
+        lns_solver.solve(setup['deadline'] - time.time())
+        optimal = lns_solver.optimal
+    finally:
+        if tracer is not None:
+            tracer.close()
+        outbox.put(('done', worker_id, optimal))
+
+
+class ParallelClingoLNS:
+
+    def __init__(self, workers, program, solver_type, solver_args, portfolio, seed, pre_opt_time=0,
+                 core_guided=False, recycle=None, trace=None, stream=None, warm_start=None, unsat_memo=None,
+                 pipeline=False, prover=None):
+        """
+        instantiates a portfolio of lns solvers running in separate processes. each worker grounds
+        the program with its own solver, uses its own seed and continues from the best solution
+        found by any worker. the portfolio is given as a json config (see json_config) and the optional
+        recycle arguments are passed to the lns.RecyclePolicy of each worker. if a trace file is given, 
+        each worker traces its moves to the file suffixed by its id (see tracing.MoveTracer). the optional
+        stream receives each improving solution of the portfolio (see stream.SolutionStream) and all workers
+        start from the optional warm start solution (see initial.WarmStartInitialOperator). if given, each worker
+        remembers the given number of unsatisfiable moves (see lns.UnsatMemo) and if pipelined, each worker relaxes
+        the next move while solving the current one (see lns.RelaxPrefetcher). the optional prover runs next to
+        the workers, which are stopped as soon as the best solution reaches its lower bound (see bound.LowerBoundProver)
+        """
+        if workers < 1:
+            raise ValueError('there has to be at least one worker')
+
+        self.__workers = workers
+        self.__program = program
+        self.__solver_type = solver_type
+        self.__solver_args = solver_args
+        self.__portfolio = portfolio
+        self.__seed = seed
+        self.__pre_opt_time = pre_opt_time
+        self.__core_guided = core_guided
+        self.__recycle = recycle
+        self.__trace = trace
+        self.__stream = stream
+        self.__warm_start = warm_start
+        self.__unsat_memo = unsat_memo
+        self.__pipeline = pipeline
+        self.__prover = prover
+
+        self.best_solution = None
+        self.optimal = False
+
+    def solve(self, timeout):
+        """
+        runs the workers for the given timelimit and returns the best solution found by any of them
+        """
+        self.best_solution = None
+        self.optimal = False
+
+        start_time = time.time()
+        time_left = lambda: timeout - (time.time() - start_time)
+
+        context = multiprocessing.get_context('spawn')
+        outbox = context.Queue()
+        inboxes = []
+        processes = []
+
+        rng = random.Random(self.__seed)
+        for worker_id in range(self.__workers):
+            setup = {
+                'program': self.__program,
+                'solverType': self.__solver_type,
+                'solverArgs': self.__solver_args,
+                'portfolio': self.__portfolio,
+                'seed': rng.randrange(sys.maxsize),
+                'deadline': start_time + timeout,
+                'preOptTime': self.__pre_opt_time,
+                'coreGuided': self.__core_guided,
+                'recycle': self.__recycle,
+                'trace': self.__trace,
+                'unsatMemo': self.__unsat_memo,
+                'pipeline': self.__pipeline,
+                'warmStart': None if self.__warm_start is None else [ str(s) for s in self.__warm_start ]
+            }
+            inbox = context.Queue()
+            process = context.Process(target=run_worker, args=(worker_id, setup, outbox, inbox), daemon=True)
+            process.start()
+            inboxes.append(inbox)
+            processes.append(process)
+
+        logger.info('started %i workers' % self.__workers)
+
+        prover = self.__prover
+        if prover is not None:
+            prover.start()
+        reported = None
+
+        running = self.__workers
+        try:
+            while running > 0 and time_left() > 0:
+                if prover is not None and self.best_solution is not None:
+                    lower = prover.poll()
+                    if (self.best_solution.cost, lower) != reported:
+                        reported = (self.best_solution.cost, lower)
+                        prover.report(self.best_solution.cost)
+                    if bound.is_proven(self.best_solution.cost, lower):
+                        logger.info('OPTIMAL SOLUTION FOUND (lower bound reached)')
+                        self.optimal = True
+                        break
+
+                try:
+                    # with a prover, the bound is polled at least once per second
+                    kind, worker_id, data = outbox.get(timeout=time_left() if prover is None else min(time_left(), 1))
+                except queue.Empty:
+                    if prover is not None:
+                        continue
+                    break
+
+                if kind == 'solution':
+                    if self.best_solution is None or data['cost'] < self.best_solution.cost:
+                        self.best_solution = solver.parse_solution(data)
+                        logger.info('worker %i found solution with cost: %s' % (worker_id, data['cost']))
+                        if self.__stream is not None:
+                            self.__stream.publish(self.best_solution)
+                        for i, inbox in enumerate(inboxes):
+                            if i != worker_id:
+                                inbox.put(data)
+                elif kind == 'done':
+                    running -= 1
+                    if data:
+                        logger.info('OPTIMAL SOLUTION FOUND')
+                        self.optimal = True
+                        break
+        finally:
+            if prover is not None:
+                prover.stop()
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+        return self.best_solution
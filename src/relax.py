@@ -1,16 +1,212 @@
 
+import array
+import heapq
 import random
+from collections import deque
+import functools
+import clingo
 import config
 import logging
 logger = logging.getLogger('root')
 
 
+class ModelIndex():
+    """
+    caches an index built from the model of the current incumbent.
+    the index is rebuilt only if a different model is passed. the cache is kept on the atom table of 
+    the model (see solver.AtomTable), hence solvers sharing the process do not share their indices
+    """
+
+    def __init__(self, build):
+        self.__build = build
+
+    def get(self, model):
+        cache = model.atoms.model_indices
+        entry = cache.get(self)
+        if entry is None or entry[0] is not model:
+            entry = (model, self.__build(model))
+            cache[self] = entry
+
+        return entry[1]
+
+
+def build_literals(model):
+    """
+    returns the program literals of the shown atoms (see solver.AtomTable)
+    """
+    return model.atoms.literals(model.indices)
+
+
+def without_positions(literals, positions):
+    """
+    returns a copy of the given array of literals without the ones at the given positions.
+    the array is copied as a whole and each removed literal is replaced by the last one, hence
+    the order of the remaining literals is not preserved
+    """
+    remaining = array.array('i', literals)
+    for i in sorted(positions, reverse=True):
+        remaining[i] = remaining[-1]
+        remaining.pop()
+
+    return remaining
+
+
+def parse_signature(signature):
+    """
+    returns the triple of name, arity and sign of a signature given as "name/arity" or "-name/arity"
+    """
+    name, arity = signature.rsplit('/', 1)
+    positive = not name.startswith('-')
+    return (name.lstrip('-'), int(arity), positive)
+
+
+def build_assignment(model, signatures=None):
+    """
+    returns the signatures of the projection (if None, the ones of the shown atoms) and the literals of the 
+    atoms of the projection as assigned by the model, i.e. the literals of the true atoms and the negated 
+    literals of the false ones (see solver.AtomTable.projection). the truth values are the ones captured 
+    from the model (see solver.Clingo.set_capture_policy), atoms may be hidden or shown conditionally.
+    a model found before the projection was computed has no captured truth values, then only its shown 
+    atoms are known to be true and the other atoms are mapped to 0, i.e. they are not assumed (see known)
+    """
+    if signatures is None:
+        signatures = { (s.name, len(s.arguments), s.positive) for s in model.shown if s.type == clingo.SymbolType.Function }
+    signatures = tuple(sorted(signatures))
+
+    projection = model.atoms.projection(signatures)
+    literals = model.atoms.literals(projection)
+
+    projections = getattr(model, 'projections', None)
+    truth = projections.get(signatures) if projections is not None else None
+    if truth is None:
+        true = set(model.indices)
+        return signatures, array.array('i', [ l if i in true else 0 for i, l in zip(projection, literals) ])
+
+    return signatures, array.array('i', [ l if t else -l for t, l in zip(truth, literals) ])
+
+
+def known(literals):
+    """
+    returns the given assumptions without the atoms of unknown truth value (see build_assignment)
+    """
+    if 0 not in literals:
+        return literals
+
+    return array.array('i', [ l for l in literals if l != 0 ])
+
+
+def build_constant_index(model):
+    """
+    returns a map from each constant occurring in the shown atoms to the positions of the atoms containing it
+    """
+    postings = {}
+    for i, s in enumerate(model.shown):
+        for c in s.arguments:
+            postings.setdefault(c, set()).add(i)
+
+    return postings
+
+
+def build_literal_positions(model):
+    """
+    returns a map from each program literal of the shown atoms to their positions
+    """
+    positions = {}
+    for i, l in enumerate(model.atoms.literals(model.indices)):
+        positions.setdefault(l, []).append(i)
+
+    return positions
+
+
+def build_cost_index(model, lex_weight=1000):
+    """
+    returns the cost contribution of each shown atom of the model (by position) or None if the model
+    does not record its minimize literals (see solver.CostObserver). the weight of each true minimize
+    literal is shared by the true shown atoms among the literal itself and the positive body literals of 
+    the rules deriving it. the priorities are combined into one value, weighted by powers of lex_weight
+    """
+    minimize = getattr(model, 'minimize', None)
+    violations = getattr(model, 'violations', None)
+    if minimize is None or violations is None:
+        return None
+
+    positions = build_literal_positions(model)
+
+    levels = sorted(set(minimize.priorities))
+    factors = { p: lex_weight**i for i, p in enumerate(levels) }
+
+    contributions = array.array('d', bytes(8 * len(model.indices)))
+    for e in violations:
+        weight = minimize.weights[e]
+        if weight <= 0:
+            continue
+
+        literal = minimize.literals[e]
+        targets = positions.get(literal)
+        if targets is None:
+            targets = [ i for l in minimize.bodies.get(literal, ()) for i in positions.get(l, ()) ]
+        if len(targets) == 0:
+            continue
+
+        share = weight * factors[minimize.priorities[e]] / len(targets)
+        for i in targets:
+            contributions[i] += share
+
+    return contributions
+
+
+def weighted_sample(weights, k, rng=random):
+    """
+    returns k distinct positions of the given weights, each drawn with a probability proportional to its weight 
+    (by the keys of Efraimidis and Spirakis). positions with weight zero are only drawn if there are no others left
+    """
+    keys = [ rng.random() ** (1.0 / w) if w > 0 else -rng.random() for w in weights ]
+    return heapq.nlargest(k, range(len(weights)), key=keys.__getitem__)
+
+
+def build_declarative_index(model):
+    """
+    returns a map from each selection name (None for the unnamed selection) to a pair of 
+    the selectable elements and a map from each element to the literals of the atoms it fixes
+    """
+    index = {}
+    for s in model.symbols:
+        if s.match(config.SELECT_PRED, 1):
+            index.setdefault(None, ([], {}))[0].append(s.arguments[0])
+
+        elif s.match(config.FIX_PRED, 2):
+            index.setdefault(None, ([], {}))[1].setdefault(s.arguments[1], []).append(s.arguments[0])
+
+        elif s.match(config.SELECT_PRED, 2):
+            index.setdefault(s.arguments[0].name, ([], {}))[0].append(s.arguments[1])
+
+        elif s.match(config.FIX_PRED, 3):
+            index.setdefault(s.arguments[0].name, ([], {}))[1].setdefault(s.arguments[2], []).append(s.arguments[1])
+
+    for _, fix in index.values():
+        for sel, atoms in fix.items():
+            fix[sel] = model.atoms.literals(model.atoms.indices(atoms))
+
+    return index
+
+
 class AbstractRelaxOperator():
 
-    def __init__(self, sizes):
+    # the literals of the shown atoms of the incumbent, shared by all operators
+    _literals = ModelIndex(build_literals)
+
+    # the assignments of the incumbent over each projection, shared by all operators
+    _assignments = {}
+
+    def __init__(self, sizes, soft=False, fix_false=False, projection=None):
         """
         initializes the operator with a non-empty set of relaxation sizes and an optional initial size. 
-        the sizes are either all relative (between zero and one) or all absolute (integers bigger than zero)
+        the sizes are either all relative (between zero and one) or all absolute (integers bigger than zero).
+        if soft, the atoms which are not relaxed are not assumed but the solver is guided towards them
+        (see solver.AtomTable.guide_assumptions).
+        if fix false, the false atoms of the incumbent which are not relaxed are assumed to be false as well,
+        over the projection given by a list of signatures (triples of name, arity and sign) or, if None, 
+        over the atoms of the ground program with the signatures of the shown atoms
         """
         if len(sizes) <= 0:
             raise ValueError('list of sizes is empty')
@@ -36,11 +232,23 @@ class AbstractRelaxOperator():
        
         self._size = self._sizes[self.__current_index]
         self._absolute = absolute
+        self._soft = soft
+        self._fix_false = fix_false
+        self._projection = None if projection is None else tuple(sorted(set(projection)))
 
-    def get_move_assumptions(self, incumbent):
+    def get_move_assumptions(self, incumbent, rng=random):
         """
-        returns the assumptions for the next VLNS move i.e. which parts of the
-        solution are not relaxed according to the given rate
+        returns the assumptions for the next VLNS move i.e. the literals of the parts
+        of the solution which are not relaxed according to the given rate.
+        the relaxation is drawn with the given random number generator (default the random module)
+        """
+        pass
+
+    def build_indices(self, incumbent):
+        """
+        builds the indices the operator reads from the given incumbent, hence a following relaxation of the same
+        incumbent only reads them. building an index may intern symbols and read the symbolic atoms of the control, 
+        which is not possible while the control solves (see lns.RelaxPrefetcher)
         """
         pass
 
@@ -77,6 +285,31 @@ class AbstractRelaxOperator():
         self.__current_index = 0
         self._size = self._sizes[self.__current_index]
 
+    def get_size(self):
+        """
+        returns the current size
+        """
+        return self._size
+
+    def get_sizes(self):
+        """
+        returns the sorted list of sizes
+        """
+        return self._sizes
+
+    def get_size_index(self):
+        """
+        returns the index of the current size
+        """
+        return self.__current_index
+
+    def set_size_index(self, index):
+        """
+        sets the current size to the one of the given index
+        """
+        self.__current_index = index
+        self._size = self._sizes[self.__current_index]
+
 
     def minimize_size(self):
         """
@@ -96,6 +329,77 @@ class AbstractRelaxOperator():
         """
         pass
 
+    def is_soft(self):
+        """
+        whether or not the operator guides the solver instead of assuming the atoms which are not relaxed
+        """
+        return self._soft
+
+    def _soften(self, incumbent, assumptions):
+        """
+        returns the given assumptions or, if the operator is soft, the assumptions guiding the solver towards them
+        """
+        if not self._soft:
+            return assumptions
+
+        return incumbent.model.atoms.guide_assumptions(assumptions)
+
+    def _assignment(self, incumbent):
+        """
+        returns the signatures of the projection and the literals of its atoms as assigned by the incumbent
+        """
+        index = self._assignments.get(self._projection)
+        if index is None:
+            index = self._assignments.setdefault(self._projection, ModelIndex(functools.partial(build_assignment, signatures=self._projection)))
+
+        return index.get(incumbent.model)
+
+    def get_projection(self):
+        """
+        returns the signatures of the projection whose truth values the operator reads, or None if it reads none
+        or its projection consists of the signatures of the shown atoms, which are only known from a model
+        """
+        return self._projection if self._fix_false else None
+
+    def _prefix(self):
+        """
+        returns the prefix of the name for the options of the operator
+        """
+        return ('soft ' if self._soft else '') + ('complete ' if self._fix_false else '')
+
+    def relax_core(self, assumptions, core):
+        """
+        returns the given assumptions without the literals of an unsatisfiable core of the previous move,
+        i.e. the atoms responsible for the failure of the previous move are relaxed first
+        """
+        core = set(core)
+        return [ a for a in assumptions if a not in core ]
+
+    def requires_costs(self):
+        """
+        whether or not the operator reads the cost contributions of the incumbent (see solver.Clingo.enable_cost_observer)
+        """
+        return False
+
+    def requires_graph(self):
+        """
+        whether or not the operator reads the dependency graph of the program (see solver.Clingo.enable_dependency_graph)
+        """
+        return False
+
+    def capture_policy(self):
+        """
+        returns which symbols of a model the operator needs (see config.CAPTURE_POLICIES).
+        the default operators only read the shown symbols, and the truth values of the projection if they fix false atoms
+        """
+        return config.CAPTURE_PROJECTION if self._fix_false else config.CAPTURE_SHOWN
+
+    def _options(self):
+        """
+        returns the keyword arguments of the constructor besides the sizes (used by flatten)
+        """
+        return { 'soft': self._soft, 'fix_false': self._fix_false, 'projection': self._projection }
+
     def flatten(self):
         """
         returns a list of operators where each contains only one of the rates
@@ -103,19 +407,22 @@ class AbstractRelaxOperator():
         operators = []
 
         for size in self._sizes:
-            operators += [ type(self)(sizes=[size]) ]
+            operators += [ type(self)(sizes=[size], **self._options()) ]
 
         return operators
 
 class RandomAtomRelaxOperator(AbstractRelaxOperator):
 
-    def __init__(self, sizes):
-        super().__init__(sizes)
+    def __init__(self, sizes, soft=False, fix_false=False, projection=None):
+        super().__init__(sizes, soft=soft, fix_false=fix_false, projection=projection)
 
-    def get_move_assumptions(self, incumbent):
-        asm = []
+    def get_move_assumptions(self, incumbent, rng=random):
+        if self._fix_false:
+            _, literals = self._assignment(incumbent)
+        else:
+            literals = self._literals.get(incumbent.model)
 
-        max_selection_sz = len(incumbent.model.shown)
+        max_selection_sz = len(literals)
 
         if self._absolute:
             selection_sz = min(max_selection_sz, self._size)
@@ -123,75 +430,246 @@ class RandomAtomRelaxOperator(AbstractRelaxOperator):
         else:
             selection_sz = round(max_selection_sz * (1 - self._size))
 
-        asm = random.sample(incumbent.model.shown, selection_sz)
+        # only the relaxed positions are sampled
+        asm = known(without_positions(literals, rng.sample(range(max_selection_sz), max_selection_sz - selection_sz)))
 
         logger.debug(
             f'atom operator relaxed {max_selection_sz - selection_sz} / {max_selection_sz} atoms.')
 
-        return asm
+        return self._soften(incumbent, asm)
+
+    def build_indices(self, incumbent):
+        if self._fix_false:
+            self._assignment(incumbent)
+        else:
+            self._literals.get(incumbent.model)
 
     def name(self):
-        return 'random atoms: ' + str(self._sizes)
+        return self._prefix() + 'random atoms: ' + str(self._sizes)
 
 
 class RandomConstantRelaxOperator(AbstractRelaxOperator):
 
-    def __init__(self, sizes):
-        super().__init__(sizes)
+    # shared by all constant operators, as the index only depends on the incumbent
+    _index = ModelIndex(build_constant_index)
 
-    def get_move_assumptions(self, incumbent):
-        constants = set()
-        for s in incumbent.model.shown:
-            constants = constants.union(s.arguments)
+    def __init__(self, sizes, soft=False, fix_false=False, projection=None):
+        super().__init__(sizes, soft=soft, fix_false=fix_false, projection=projection)
+
+    def get_move_assumptions(self, incumbent, rng=random):
+        if self._fix_false:
+            signatures, literals = self._assignment(incumbent)
+            postings = incumbent.model.atoms.projection_index(signatures)
+        else:
+            postings = self._index.get(incumbent.model)
+            literals = self._literals.get(incumbent.model)
+        constants = list(postings)
 
         if self._absolute:
             relaxed_number = min(len(constants), self._size)
         else:
             relaxed_number = int(len(constants) * self._size)
-        relaxed_constants = set(random.sample(constants, relaxed_number))
 
-        assumptions = [
-            s for s in incumbent.model.shown if relaxed_constants.isdisjoint(s.arguments)]
+        relaxed = set()
+        for c in rng.sample(constants, relaxed_number):
+            relaxed.update(postings[c])
+
+        assumptions = known(without_positions(literals, relaxed))
 
         logger.debug(f"constant operator relaxed "
-                     f"{len(incumbent.model.shown) - len(assumptions)} / {len(incumbent.model.shown)} atoms.")
+                     f"{len(literals) - len(assumptions)} / {len(literals)} atoms.")
 
-        return assumptions
+        return self._soften(incumbent, assumptions)
+
+    def build_indices(self, incumbent):
+        if self._fix_false:
+            signatures, _ = self._assignment(incumbent)
+            incumbent.model.atoms.projection_index(signatures)
+        else:
+            self._index.get(incumbent.model)
+            self._literals.get(incumbent.model)
 
     def name(self):
-        return 'random constants: ' + str(self._sizes)
+        return self._prefix() + 'random constants: ' + str(self._sizes)
 
-class DeclarativeRelaxOperator(AbstractRelaxOperator):
+class CostRelaxOperator(AbstractRelaxOperator):
 
-    def __init__(self, sizes, name=None):
-        super().__init__(sizes)
-        self.__name = name
+    # shared by all cost operators, as the contributions only depend on the incumbent
+    _costs = ModelIndex(build_cost_index)
 
-    def get_move_assumptions(self, incumbent):
+    def __init__(self, sizes, constants=False, smoothing=0.1, soft=False):
         """
-        returns the assumptions for the next VLNS move i.e. which parts of the
-        solution are not relaxed according to the given rate
+        relaxes the shown atoms (or if constants, the constants occurring in them) of the incumbent which 
+        contribute to its cost with a higher probability, the cost contribution of an atom is the weight of the 
+        minimize literals it derives (see build_cost_index) and the one of a constant is the sum of the 
+        contributions of its atoms. the given fraction of the mean contribution is added to each one, hence 
+        parts without cost are relaxed as well. as long as the contributions of the incumbent are unknown 
+        (e.g. after a recycle), the parts are relaxed uniformly
+        """
+        super().__init__(sizes, soft=soft)
+        self.__constants = constants
+        self.__smoothing = smoothing
+
+    def __weights(self, contributions):
+        mean = sum(contributions) / len(contributions) if len(contributions) > 0 else 0.0
+        if mean <= 0:
+            return [ 1.0 ] * len(contributions)
+
+        offset = self.__smoothing * mean
+        return [ c + offset for c in contributions ]
+
+    def get_move_assumptions(self, incumbent, rng=random):
+        literals = self._literals.get(incumbent.model)
+        contributions = self._costs.get(incumbent.model)
+        if contributions is None:
+            contributions = [ 0.0 ] * len(literals)
+
+        if self.__constants:
+            postings = RandomConstantRelaxOperator._index.get(incumbent.model)
+            constants = list(postings)
+            weights = self.__weights([ sum(contributions[i] for i in postings[c]) for c in constants ])
+            count = len(constants)
+        else:
+            weights = self.__weights(contributions)
+            count = len(literals)
+
+        if self._absolute:
+            relaxed_number = min(count, self._size)
+        else:
+            relaxed_number = round(count * self._size)
+
+        selection = weighted_sample(weights, relaxed_number, rng)
+
+        if self.__constants:
+            relaxed = set()
+            for i in selection:
+                relaxed.update(postings[constants[i]])
+        else:
+            relaxed = selection
+
+        assumptions = without_positions(literals, relaxed)
+
+        logger.debug(f'cost operator relaxed {len(literals) - len(assumptions)} / {len(literals)} atoms.')
+
+        return self._soften(incumbent, assumptions)
+
+    def build_indices(self, incumbent):
+        self._literals.get(incumbent.model)
+        self._costs.get(incumbent.model)
+        if self.__constants:
+            RandomConstantRelaxOperator._index.get(incumbent.model)
+
+    def requires_costs(self):
+        return True
+
+    def name(self):
+        return self._prefix() + 'cost ' + ('constants' if self.__constants else 'atoms') + ': ' + str(self._sizes)
+
+    def _options(self):
+        return { 'soft': self._soft, 'constants': self.__constants, 'smoothing': self.__smoothing }
+
+class ClusterRelaxOperator(AbstractRelaxOperator):
+
+    # shared by all cluster operators, as the positions only depend on the incumbent
+    _positions = ModelIndex(build_literal_positions)
+
+    def __init__(self, sizes, soft=False):
+        """
+        relaxes clusters of shown atoms of the incumbent which are connected in the ground program
+        (see solver.DependencyObserver). each cluster is grown by a breadth first search with a random 
+        order of the rules of each atom, starting at a random shown atom, until the size is reached or 
+        the component of the atom is exhausted. shown terms which are no atoms of the program, and any 
+        remainder once all atoms are visited, are relaxed uniformly
         """
-        asm = []
+        super().__init__(sizes, soft=soft)
+
+    def get_move_assumptions(self, incumbent, rng=random):
+        model = incumbent.model
+        literals = self._literals.get(model)
+        positions = self._positions.get(model)
+        graph = model.graph
+
+        max_selection_sz = len(literals)
+        if self._absolute:
+            relaxed_number = min(max_selection_sz, self._size)
+        else:
+            relaxed_number = round(max_selection_sz * self._size)
+
+        # shown terms which are no atoms have no positive literal and cannot be reached from the graph
+        seeds = [ l for l in positions if l > 0 ]
+        rng.shuffle(seeds)
+
+        relaxed = set()
+        visited_atoms = set()
+        visited_edges = set()
+        clusters = 0
+        for seed in seeds:
+            if len(relaxed) >= relaxed_number:
+                break
+            if seed in visited_atoms:
+                continue
+
+            clusters += 1
+            visited_atoms.add(seed)
+            queue = deque([ seed ])
+            while queue and len(relaxed) < relaxed_number:
+                atom = queue.popleft()
+                relaxed.update(positions.get(atom, ()))
+
+                edges = list(graph.edges(atom))
+                rng.shuffle(edges)
+                for e in edges:
+                    if e in visited_edges:
+                        continue
+                    visited_edges.add(e)
+                    for a in graph.atoms(e):
+                        if a not in visited_atoms:
+                            visited_atoms.add(a)
+                            queue.append(a)
+
+        # the positions which are not reachable from any seed are relaxed uniformly
+        if len(relaxed) < relaxed_number:
+            remaining = [ i for i in range(max_selection_sz) if i not in relaxed ]
+            relaxed.update(rng.sample(remaining, relaxed_number - len(relaxed)))
+
+        # the last literal may be shared by several shown atoms
+        relaxed = list(relaxed)[:max(relaxed_number, 0)]
+        assumptions = without_positions(literals, relaxed)
+
+        logger.debug(f'cluster operator relaxed {len(relaxed)} / {max_selection_sz} atoms in {clusters} clusters.')
+
+        return self._soften(incumbent, assumptions)
+
+    def build_indices(self, incumbent):
+        self._literals.get(incumbent.model)
+        self._positions.get(incumbent.model)
+
+    def requires_graph(self):
+        return True
 
-        select = []
-        fix = []
+    def name(self):
+        return self._prefix() + 'clusters: ' + str(self._sizes)
 
-        for s in incumbent.model.symbols:
+    def _options(self):
+        return { 'soft': self._soft }
 
-            if self.__name is None:
-                if s.match(config.SELECT_PRED, 1):
-                    select.append(s.arguments[0])
+class DeclarativeRelaxOperator(AbstractRelaxOperator):
 
-                elif s.match(config.FIX_PRED, 2):
-                    fix.append((s.arguments[0], s.arguments[1]))
+    # shared by all declarative operators, the selections of all names are indexed in one pass
+    _index = ModelIndex(build_declarative_index)
 
-            else:
-                if s.match(config.SELECT_PRED, 2) and s.arguments[0].name == self.__name:
-                    select.append(s.arguments[1])
+    def __init__(self, sizes, name=None, soft=False):
+        super().__init__(sizes, soft=soft)
+        self.__name = name
+
+    def get_move_assumptions(self, incumbent, rng=random):
+        """
+        returns the assumptions for the next VLNS move i.e. which parts of the
+        solution are not relaxed according to the given rate
+        """
+        asm = array.array('i')
 
-                elif s.match(config.FIX_PRED, 3) and s.arguments[0].name == self.__name:
-                    fix.append((s.arguments[1], s.arguments[2]))
+        select, fix = self._index.get(incumbent.model).get(self.__name, ([], {}))
 
         max_selection_sz = len(select)
         if max_selection_sz <= 0:
@@ -203,33 +681,30 @@ class DeclarativeRelaxOperator(AbstractRelaxOperator):
         else:
             selection_sz = round(max_selection_sz * (1 - self._size))
 
-        selection = random.sample(select, selection_sz)
+        selection = rng.sample(select, selection_sz)
         for sel in selection:
-            for atom, s in fix:
-                if sel == s:
-                    asm.append(atom)
+            asm.extend(fix.get(sel, ()))
 
         logger.debug(f"lns_select operator relaxed "
                      f"{max_selection_sz - selection_sz} / {max_selection_sz} atoms.")
 
-        return asm
+        return self._soften(incumbent, asm)
+
+    def build_indices(self, incumbent):
+        self._index.get(incumbent.model)
 
     def name(self):
+        prefix = 'soft ' if self._soft else ''
         if self.__name != None:
-            return 'lns_select "' + self.__name + '": ' + str(self._sizes)
+            return prefix + 'lns_select "' + self.__name + '": ' + str(self._sizes)
         else:
-            return 'lns_select: ' + str(self._sizes)
+            return prefix + 'lns_select: ' + str(self._sizes)
 
-    def flatten(self):
-        """
-        returns a list of operators where each contains only one of the rates
-        """
-        operators = []
+    def capture_policy(self):
+        return config.CAPTURE_DECLARATIVE
 
-        for size in self._sizes:
-            operators += [ type(self)(sizes=[size], name=self.__name) ]
-
-        return operators
+    def _options(self):
+        return { 'soft': self._soft, 'name': self.__name }
 
 # RelaxOperator Factory
 
@@ -238,16 +713,39 @@ def get_operator(type, args):
     returns a new relax operator of the given type with given args
     """
     sizes = args['sizes']
+    soft = False
+    if 'soft' in args:
+        soft = args['soft']
+
+    fix_false = False
+    if 'fixFalse' in args:
+        fix_false = args['fixFalse']
+
+    projection = None
+    if 'projection' in args:
+        projection = [ parse_signature(s) for s in args['projection'] ]
 
     if type == 'randomAtoms':
-        return RandomAtomRelaxOperator(sizes)
+        return RandomAtomRelaxOperator(sizes, soft=soft, fix_false=fix_false, projection=projection)
     elif type == 'randomConstants':
-        return RandomConstantRelaxOperator(sizes)
+        return RandomConstantRelaxOperator(sizes, soft=soft, fix_false=fix_false, projection=projection)
+    elif type == 'cost':
+        constants = False
+        if 'constants' in args:
+            constants = args['constants']
+
+        smoothing = 0.1
+        if 'smoothing' in args:
+            smoothing = args['smoothing']
+
+        return CostRelaxOperator(sizes, constants=constants, smoothing=smoothing, soft=soft)
+    elif type == 'cluster':
+        return ClusterRelaxOperator(sizes, soft=soft)
     elif type == 'declarative':
         name = None
         if 'name' in args:
             name = args['name']
 
-        return DeclarativeRelaxOperator(sizes, name=name)
+        return DeclarativeRelaxOperator(sizes, name=name, soft=soft)
     else:
         raise ValueError('unknown relax operator "%s"' % type)
\ No newline at end of file
@@ -58,6 +58,25 @@ class AbstractSearchOperator:
         self.__current_index = 0
         self._timeout = self.__timeouts[self.__current_index]
 
+    def get_size(self):
+        """
+        returns the current timeout
+        """
+        return self._timeout
+
+    def get_size_index(self):
+        """
+        returns the index of the current timeout
+        """
+        return self.__current_index
+
+    def set_size_index(self, index):
+        """
+        sets the current timeout to the one of the given index
+        """
+        self.__current_index = index
+        self._timeout = self.__timeouts[self.__current_index]
+
     def flatten(self):
         """
         returns a list of operators where each contains only one of the timeouts
@@ -69,7 +88,10 @@ class AbstractSearchOperator:
 
         return operators
     
-    def execute(self, assumptions, time_left):
+    def execute(self, assumptions, time_left, rng=random):
+        """
+        solves the move given by the assumptions, random decisions are drawn with the given random number generator
+        """
         pass
 
     def name(self):
@@ -78,17 +100,24 @@ class AbstractSearchOperator:
 
 class ClingoSearchOperator(AbstractSearchOperator):
 
-    def __init__(self, internal_solver, timeouts, strict_bound_prob=1.0):
+    def __init__(self, internal_solver, timeouts, strict_bound_prob=1.0, solver_arguments=''):
+        """
+        the optional solver arguments (e.g. "--heuristic=Domain") configure the internal solver
+        for the moves of this operator only
+        """
         super().__init__(timeouts)
         self.__timeouts = timeouts
         self.__strict_bound_prob = strict_bound_prob
         self.__internal_solver = internal_solver
+        self.__solver_arguments = solver_arguments.strip()
+        self.__settings = internal_solver.parse_arguments(self.__solver_arguments)
 
-    def execute(self, assumptions, time_left):
+    def execute(self, assumptions, time_left, rng=random):
         timeout = min(self._timeout, time_left)
         logger.debug(f'operator executing search for {timeout} seconds')
         return self.__internal_solver.solve(timelimit=timeout, modellimit=1, assumptions=assumptions,
-                                            strict_bound=self.__strict_bound_prob > random.random())
+                                            strict_bound=self.__strict_bound_prob > rng.random(),
+                                            settings=self.__settings)
 
     def flatten(self):
         """
@@ -97,12 +126,76 @@ class ClingoSearchOperator(AbstractSearchOperator):
         operators = []
 
         for timeout in self.__timeouts:
-            operators += [ ClingoSearchOperator(internal_solver=self.__internal_solver, timeouts=[timeout]) ]
+            operators += [ ClingoSearchOperator(internal_solver=self.__internal_solver, timeouts=[timeout],
+                                                strict_bound_prob=self.__strict_bound_prob,
+                                                solver_arguments=self.__solver_arguments) ]
+
+        return operators
+
+    def name(self):
+        if self.__solver_arguments:
+            return 'default: ' + str(self.__timeouts) + ' "' + self.__solver_arguments + '"'
+        else:
+            return 'default: ' + str(self.__timeouts)
+
+
+class BudgetedSearchOperator(AbstractSearchOperator):
+
+    def __init__(self, internal_solver, conflicts, restarts=None, growth=2.0, max_growth=16.0, solver_arguments=''):
+        """
+        bounds each move by a number of conflicts (and optionally restarts) of clasp instead of a timeout,
+        hence moves are reproducible for a given seed. the sizes of the operator are the conflict budgets.
+        the budget adapts to the moves: it is multiplied by growth (up to max_growth times the size) after 
+        each move exhausting it and reset after each move finding a solution
+        """
+        super().__init__(conflicts)
+        self.__conflicts = conflicts
+        self.__restarts = restarts
+        self.__growth = growth
+        self.__max_growth = max_growth
+        self.__internal_solver = internal_solver
+        self.__solver_arguments = solver_arguments.strip()
+        self.__settings = internal_solver.parse_arguments(self.__solver_arguments)
+        self.__factor = 1.0
+
+    def execute(self, assumptions, time_left, rng=random):
+        budget = int(self._timeout * self.__factor)
+        limit = str(budget) if self.__restarts is None else '%i,%i' % (budget, self.__restarts)
+        logger.debug(f'operator executing search for {budget} conflicts')
+
+        settings = dict(self.__settings)
+        settings['solve_limit'] = limit
+        solution = self.__internal_solver.solve(timelimit=time_left, modellimit=1, assumptions=assumptions,
+                                                settings=settings)
+
+        if solution.sat:
+            self.__factor = 1.0
+        elif solution.sat is None and not solution.exhausted:
+            self.__factor = min(self.__factor * self.__growth, self.__max_growth)
+
+        return solution
+
+    def flatten(self):
+        """
+        overriding to inject the internal solver
+        """
+        operators = []
+
+        for conflicts in self.__conflicts:
+            operators += [ BudgetedSearchOperator(internal_solver=self.__internal_solver, conflicts=[conflicts],
+                                                  restarts=self.__restarts, growth=self.__growth,
+                                                  max_growth=self.__max_growth,
+                                                  solver_arguments=self.__solver_arguments) ]
 
         return operators
 
     def name(self):
-        return 'default: ' + str(self.__timeouts)
+        name = 'budgeted: ' + str(self.__conflicts)
+        if self.__restarts is not None:
+            name += ' restarts: ' + str(self.__restarts)
+        if self.__solver_arguments:
+            name += ' "' + self.__solver_arguments + '"'
+        return name
 
 
 # SearchOperator Factory
@@ -113,6 +206,25 @@ def get_operator(type, args, internal_solver):
     """
     if type == 'default':
         timeouts = args['timeouts']
-        return ClingoSearchOperator(internal_solver, timeouts)
+        solver_arguments = ''
+        if 'solverArguments' in args:
+            solver_arguments = args['solverArguments']
+        return ClingoSearchOperator(internal_solver, timeouts, solver_arguments=solver_arguments)
+    elif type == 'budgeted':
+        conflicts = args['conflicts']
+        restarts = None
+        if 'restarts' in args:
+            restarts = args['restarts']
+        growth = 2.0
+        if 'growth' in args:
+            growth = args['growth']
+        max_growth = 16.0
+        if 'maxGrowth' in args:
+            max_growth = args['maxGrowth']
+        solver_arguments = ''
+        if 'solverArguments' in args:
+            solver_arguments = args['solverArguments']
+        return BudgetedSearchOperator(internal_solver, conflicts, restarts=restarts, growth=growth,
+                                      max_growth=max_growth, solver_arguments=solver_arguments)
     else:
         raise ValueError('no search operator "%s"' % type)
\ No newline at end of file
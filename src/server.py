@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import hashlib
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+import config
+import initial
+import json_config
+import lns
+import solver
+logger = config.setup_logger('root')
+
+
+class SolverPool:
+
+    def __init__(self, capacity=8):
+        """
+        keeps up to capacity grounded internal solvers with their incumbents between jobs. solvers are identified
+        by the encoding, the facts, the solver type, the solver arguments, the portfolio and the seed, hence a 
+        repeated job continues from the incumbent of the previous one without grounding. the encodings are read 
+        and parsed once per modification of their file, hence a job with new facts only parses its facts
+        """
+        self.__capacity = capacity
+        self.__idle = OrderedDict()
+        self.__encodings = {}
+        self.__lock = threading.Lock()
+
+    def encoding(self, path):
+        """
+        returns the statements of the given encoding file (see solver.parse_program)
+        """
+        mtime = os.path.getmtime(path)
+        with self.__lock:
+            cached = self.__encodings.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        with open(path, 'r') as f:
+            statements = solver.parse_program(f.read())
+
+        with self.__lock:
+            self.__encodings[path] = (mtime, statements)
+        return statements
+
+    def acquire(self, key):
+        """
+        returns an idle entry (a triple of the internal solver, its incumbent and whether the incumbent is
+        optimal) of the given key or None, the entry is removed from the pool until it is released
+        """
+        with self.__lock:
+            entries = self.__idle.get(key)
+            if not entries:
+                return None
+
+            entry = entries.pop()
+            if len(entries) == 0:
+                del self.__idle[key]
+            return entry
+
+    def release(self, key, entry):
+        """
+        returns an entry to the pool, the least recently used entries are dropped if the pool is full
+        """
+        with self.__lock:
+            self.__idle.setdefault(key, []).append(entry)
+            self.__idle.move_to_end(key)
+
+            while sum(len(e) for e in self.__idle.values()) > self.__capacity:
+                oldest = next(iter(self.__idle))
+                self.__idle[oldest].pop(0)
+                if len(self.__idle[oldest]) == 0:
+                    del self.__idle[oldest]
+
+
+class SocketStream:
+    """
+    writes each improving solution of a job as a json line to the client (in place of a stream.SolutionStream)
+    """
+
+    def __init__(self, out, start_time):
+        self.__out = out
+        self.__start_time = start_time
+
+    def publish(self, solution):
+        write_message(self.__out, { 'type': 'solution', 'elapsed': time.time() - self.__start_time,
+                                    'cost': solution.cost, 'atoms': [ str(a) for a in solution.model.shown ] })
+
+
+def write_message(out, message):
+    out.write((json.dumps(message) + '\n').encode())
+    out.flush()
+
+
+def run_job(pool, request, out):
+    """
+    solves the job of the given request and writes the improving solutions and the result to out.
+    a request is a json object with the path of the encoding, the facts of the instance, the time limit
+    and optionally the portfolio config, the seed, the solver type and solver arguments (as for alaspo).
+    a job only continues from the incumbent of a job with the same seed (or of another job without seed)
+    """
+    start_time = time.time()
+
+    encoding_path = os.path.abspath(request['encoding'])
+    facts = request.get('facts', '')
+    time_limit = request.get('timeLimit', 60)
+    solver_type = request.get('solverType', 'clingo')
+    solver_arguments = request.get('solverArguments', '')
+    portfolio = request.get('config', None)
+    portfolio = json_config.DEFAULT_CONFIG if portfolio is None else json.dumps(portfolio)
+
+    key = (encoding_path, hashlib.sha1(facts.encode()).hexdigest(), solver_type, solver_arguments, portfolio,
+           request.get('seed'))
+    # jobs run concurrently, hence each one draws from its own generator instead of the random module
+    rng = random.Random(request['seed']) if 'seed' in request else random.Random()
+
+    entry = pool.acquire(key)
+    if entry is None:
+        solver_args = { 'options': solver_arguments.split(' ') if solver_arguments else None,
+                        'seed': request.get('seed', rng.randrange(sys.maxsize)) }
+        internal_solver = solver.get_solver(solver_type, solver_args)
+        # the parsed encoding is added right away, only the facts are parsed and loaded by the lns solver
+        internal_solver.load_statements(pool.encoding(encoding_path))
+        program = facts
+        initial_operator = initial.ClingoInitialOperator(internal_solver, time_limit)
+        logger.info('grounding a new solver for %s' % encoding_path)
+    else:
+        internal_solver, incumbent, optimal = entry
+        program = None
+        if optimal:
+            incumbent.exhausted = True
+        initial_operator = initial.IncumbentInitialOperator(internal_solver, time_limit, incumbent)
+        logger.info('continuing with a resident solver for %s from cost %s' % (encoding_path, str(incumbent.cost)))
+
+    strat, relax_operators, search_operators = json_config.parse_config(portfolio, internal_solver)
+    lns_solver = lns.ClingoLNS(internal_solver, program, initial_operator, relax_operators, search_operators, strat,
+                               stream=SocketStream(out, start_time), rng=rng)
+
+    solution = lns_solver.solve(time_limit - (time.time() - start_time))
+
+    result = { 'type': 'result', 'elapsed': time.time() - start_time, 'resident': entry is not None,
+               'optimal': lns_solver.optimal, 'cost': None, 'atoms': None }
+    if solution is not None:
+        result['cost'] = solution.cost
+        result['atoms'] = [ str(a) for a in solution.model.shown ]
+        pool.release(key, (internal_solver, solution, lns_solver.optimal))
+    write_message(out, result)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+                run_job(self.server.pool, request, self.wfile)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning('client disconnected')
+                return
+            except Exception as e:
+                logger.exception('job failed')
+                write_message(self.wfile, { 'type': 'error', 'message': str(e) })
+
+
+class SolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        """
+        serves jobs on the unix socket at the given path, each line of a connection is a request (see run_job)
+        answered by json lines of the improving solutions and the result
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, RequestHandler)
+        self.pool = pool
+
+
+def request(path, job):
+    """
+    sends the given job to the server listening at the given path and yields its json messages up to the result
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(path)
+        s.sendall((json.dumps(job) + '\n').encode())
+        with s.makefile('r') as f:
+            for line in f:
+                message = json.loads(line)
+                yield message
+                if message['type'] in ('result', 'error'):
+                    return
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                     description='ALASPO server keeping ground programs resident between jobs')
+
+    parser.add_argument('-s', '--socket', type=str, metavar='<file>', default='alaspo.sock',
+                        help='the path of the unix socket to listen on')
+
+    parser.add_argument('-ps', '--pool-size', type=int, metavar='<n>', default=8,
+                        help='the maximum number of resident solvers')
+
+    args = parser.parse_args()
+
+    server = SolverServer(args.socket, SolverPool(args.pool_size))
+    logger.info('listening on ' + args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(args.socket)
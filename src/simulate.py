@@ -0,0 +1,323 @@
+import os
+import re
+import sys
+import array
+import random
+import argparse
+import logging
+import initial
+import lns
+import relax
+import tracing
+import benchmark
+import json_config
+logger = logging.getLogger('root')
+
+# the assumptions of a simulated move, the lns loop treats an unsatisfiable move without assumptions as optimal
+REPLAY_ASSUMPTIONS = array.array('i', [ 1 ])
+
+
+def operator_kind(name):
+    """
+    returns the name of an operator without its list of sizes, e.g. "random atoms" for "random atoms: [0.1, 0.2]"
+    """
+    return re.sub(r': \[[^\]]*\]', '', name)
+
+
+def scalar_cost(cost):
+    """
+    returns the cost of the highest priority level (lexicographic costs are simulated on this level only)
+    """
+    return cost[0] if isinstance(cost, list) else cost
+
+
+class MoveDistribution:
+
+    def __init__(self, traces):
+        """
+        the empirical distribution of the moves recorded in the given traces (lists of records of tracing.MoveTracer).
+        the moves are grouped by their operators and sizes. the best cost of all traces is taken as the optimum and
+        an improvement is stored as the fraction of the gap between the improved cost and the optimum it closed
+        """
+        self.__initial = []
+        self.__moves = {}
+
+        costs = [ scalar_cost(r['cost']) for records in traces for r in records if r['cost'] is not None ]
+        if len(costs) == 0:
+            raise ValueError('the traces contain no solution')
+        self.optimum = min(costs)
+
+        for records in traces:
+            prev_cost = None
+            for r in records:
+                cost = scalar_cost(r['cost'])
+                if r['outcome'] == tracing.OUTCOME_INITIAL:
+                    self.__initial.append((r['elapsed'], cost))
+                    prev_cost = cost
+                    continue
+
+                if prev_cost is None:
+                    continue
+
+                # an improvement of a lower priority level at the optimum of the highest one closes no gap
+                improvement = 0.0
+                if r['outcome'] == tracing.OUTCOME_IMPROVED and prev_cost > self.optimum:
+                    improvement = (prev_cost - cost) / (prev_cost - self.optimum)
+                duration = r.get('relaxTime', 0.0) + r.get('solveTime', 0.0)
+                move = (r['outcome'], duration, improvement)
+
+                for key in self.__keys(r.get('relaxOperator'), r.get('relaxSize'), r.get('searchOperator'), r.get('searchSize')):
+                    self.__moves.setdefault(key, []).append(move)
+
+                prev_cost = cost
+
+        if len(self.__initial) == 0:
+            raise ValueError('the traces contain no initial solution')
+
+    def __keys(self, relax_operator, relax_size, search_operator, search_size):
+        relax_kind = None if relax_operator is None else operator_kind(relax_operator)
+        search_kind = None if search_operator is None else operator_kind(search_operator)
+        return [ (relax_kind, relax_size, search_kind, search_size), (relax_kind, relax_size), (relax_kind,), () ]
+
+    def sample_initial(self, rng):
+        """
+        returns the time and cost of a random initial solution
+        """
+        return rng.choice(self.__initial)
+
+    def sample_move(self, relax_operator, search_operator, rng):
+        """
+        returns the outcome, duration and closed fraction of the gap of a random move of the given operators. if there is
+        no move of the operators in their current sizes, moves of the relax operator in any size (or of any operators) are used
+        """
+        for key in self.__keys(relax_operator.name(), relax_operator.get_size(), search_operator.name(), search_operator.get_size()):
+            moves = self.__moves.get(key)
+            if moves:
+                return rng.choice(moves)
+
+        raise ValueError('the traces contain no moves')
+
+
+class ReplayRelaxOperator(relax.AbstractRelaxOperator):
+
+    def __init__(self, sizes, kind, soft=False):
+        """
+        stands in for a relax operator of the given kind (see operator_kind), its moves are replayed by the ReplaySolver
+        """
+        super().__init__(sizes, soft=soft)
+        self.__kind = kind
+
+    def get_move_assumptions(self, incumbent, rng=random):
+        return REPLAY_ASSUMPTIONS
+
+    def name(self):
+        return self.__kind + ': ' + str(self._sizes)
+
+    def _options(self):
+        return { 'kind': self.__kind, 'soft': self._soft }
+
+
+class ReplaySolver:
+
+    def __init__(self, distribution, rng):
+        """
+        implements the interface of solver.Clingo used by the lns loop and the search operators,
+        but replays the moves of the given distribution on a virtual clock instead of solving
+        """
+        self.__distribution = distribution
+        self.__rng = rng
+        self.__time = 0.0
+        self.__lns = None
+        self.__cost = None
+
+    def attach(self, lns_solver):
+        """
+        sets the lns solver whose current operators select the replayed moves
+        """
+        self.__lns = lns_solver
+
+    def clock(self):
+        return self.__time
+
+    def __make_solution(self, sat, cost, exhausted):
+        solution = argparse.Namespace()
+        solution.sat = sat
+        solution.cost = cost
+        solution.exhausted = exhausted
+        solution.core = None
+        solution.model = None
+        if sat:
+            solution.model = argparse.Namespace(cost=[ cost ], shown=[], symbols=[], indices=array.array('i'))
+        return solution
+
+    def solve(self, assumptions=[], timelimit=None, modellimit=None, strict_bound=True, settings=None):
+        if self.__cost is None:
+            elapsed, cost = self.__distribution.sample_initial(self.__rng)
+            self.__time += elapsed
+            self.__cost = cost
+            return self.__make_solution(True, cost, False)
+
+        outcome, duration, improvement = self.__distribution.sample_move(self.__lns.relax_operator,
+                                                                         self.__lns.search_operator, self.__rng)
+
+        # a move which took longer than allowed becomes a timeout, as does a recorded timeout
+        if timelimit is not None and duration > timelimit:
+            outcome = tracing.OUTCOME_TIMEOUT
+            duration = timelimit
+        if outcome == tracing.OUTCOME_TIMEOUT and timelimit is not None:
+            duration = timelimit
+        self.__time += duration
+
+        # the optimum cannot be improved
+        if outcome == tracing.OUTCOME_IMPROVED and self.__cost <= self.__distribution.optimum:
+            outcome = tracing.OUTCOME_UNSAT
+
+        if outcome == tracing.OUTCOME_IMPROVED:
+            self.__cost -= max(1, round(improvement * (self.__cost - self.__distribution.optimum)))
+            return self.__make_solution(True, self.__cost, False)
+        elif outcome == tracing.OUTCOME_SAT:
+            return self.__make_solution(True, self.__cost, False)
+        elif outcome == tracing.OUTCOME_UNSAT:
+            return self.__make_solution(False, None, True)
+        else:
+            return self.__make_solution(None, None, False)
+
+    def set_bound(self, cost):
+        self.__cost = cost
+
+    def load_string(self, inputstring):
+        pass
+
+    def ground(self):
+        pass
+
+    def set_capture_policy(self, policy):
+        pass
+
+    def add_projection(self, signatures):
+        pass
+
+    def enable_guidance(self):
+        pass
+
+    def enable_cost_observer(self):
+        pass
+
+    def enable_dependency_graph(self):
+        pass
+
+    def parse_arguments(self, arguments):
+        return {}
+
+    def literals(self, symbols):
+        return REPLAY_ASSUMPTIONS
+
+    def core_atoms(self, core, assumptions):
+        return []
+
+    def recycle(self):
+        pass
+
+    def relink_solution(self, solution):
+        return solution
+
+    def enable_statistics(self):
+        pass
+
+    def get_statistics(self):
+        return { key: 0 for key in tracing.SOLVER_STATISTICS }
+
+
+class TrajectoryRecorder:
+    """
+    records the improving solutions of a simulated run (in place of a stream.SolutionStream)
+    """
+
+    def __init__(self, clock):
+        self.__clock = clock
+        self.trajectory = []
+
+    def publish(self, solution):
+        self.trajectory.append((self.__clock(), solution.cost))
+
+
+def parse_portfolio(portfolio, internal_solver):
+    """
+    returns the strategy and the operators of a portfolio config (see json_config) where each relax operator
+    is replaced by a ReplayRelaxOperator of the same kind
+    """
+    strat, relax_operators, search_operators = json_config.parse_config(portfolio, internal_solver)
+    relax_operators = [ ReplayRelaxOperator(op.get_sizes(), operator_kind(op.name()), soft=op.is_soft()) for op in relax_operators ]
+
+    return strat, relax_operators, search_operators
+
+
+def simulate(distribution, portfolio, time_limit, seed):
+    """
+    simulates one lns run with the given portfolio config and returns its trajectory, i.e. the list
+    of (elapsed, cost) pairs of its improvements
+    """
+    rng = random.Random(seed)
+    random.seed(rng.randrange(sys.maxsize))
+
+    internal_solver = ReplaySolver(distribution, rng)
+    strat, relax_operators, search_operators = parse_portfolio(portfolio, internal_solver)
+    initial_operator = initial.ClingoInitialOperator(internal_solver, time_limit)
+    recorder = TrajectoryRecorder(internal_solver.clock)
+
+    lns_solver = lns.ClingoLNS(internal_solver, '', initial_operator, relax_operators, search_operators, strat,
+                               stream=recorder, clock=internal_solver.clock)
+    internal_solver.attach(lns_solver)
+    lns_solver.solve(time_limit)
+
+    return recorder.trajectory
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                     description='Simulation of ALASPO strategies by replaying traced moves')
+
+    parser.add_argument('-t', '--traces', type=str, metavar='<file>', nargs='+', required=True,
+                        help='the traces of real runs (see --trace of alaspo) whose moves are replayed')
+
+    parser.add_argument('-c', '--config-files', type=str, metavar='<file>', nargs='+', default=None,
+                        help='the portfolio config files to compare (default: the default portfolio)')
+
+    parser.add_argument('-n', '--runs', type=int, metavar='<n>', default=1000,
+                        help='number of simulated runs per config')
+
+    parser.add_argument('-gt', '--time-limit', type=int, metavar='<n>', default=300,
+                        help='simulated time limit of each run')
+
+    parser.add_argument('-sd', '--seed', type=int, metavar='SEED', default=0,
+                        help='seed of the first run')
+
+    parser.add_argument('-tg', '--target-gap', type=float, metavar='<f>', default=0.0,
+                        help='the gap to the best simulated cost a run has to reach for the time-to-target')
+
+    args = parser.parse_args()
+
+    distribution = MoveDistribution([ tracing.read_trace(path) for path in args.traces ])
+
+    configs = [ ('default', None) ]
+    if args.config_files is not None:
+        configs = [ (os.path.splitext(os.path.basename(c))[0], c) for c in args.config_files ]
+
+    # the simulated runs would flood the log
+    logger.setLevel(logging.WARNING)
+
+    runs = []
+    for label, config_file in configs:
+        if config_file is None:
+            portfolio = json_config.DEFAULT_CONFIG
+        else:
+            with open(config_file, 'r') as f:
+                portfolio = f.read()
+
+        for seed in range(args.seed, args.seed + args.runs):
+            trajectory = simulate(distribution, portfolio, args.time_limit, seed)
+            runs.append({ 'config': label, 'instance': 'simulated', 'seed': seed, 'trajectory': trajectory })
+
+    runs = benchmark.evaluate(runs, args.time_limit, args.target_gap, {})
+    benchmark.print_summary(benchmark.summarize(runs, configs))
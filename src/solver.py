@@ -1,4 +1,5 @@
 import argparse
+import array
 import os.path
 import sys
 import time
@@ -8,13 +9,276 @@ import clingo.ast
 import clingo.control
 import clingo.theory
 import clingodl
-from clingo.symbol import Number
+from clingo.symbol import Function, Number
+from clingo.backend import HeuristicType, Observer, TruthValue
 import clingcon
 
+import config
+
 import logging
 logger = logging.getLogger('root')
 
 
+class AtomTable:
+    """
+    interns the symbols of the ground program of a clingo.Control. each symbol is stored once and
+    identified by its index, models refer to their atoms by arrays of these indices (see CompactModel).
+    the program literal of each symbol is looked up in the symbolic atoms only once, symbols which are 
+    no atoms of the ground program are mapped to a false literal (as done by clingo for symbolic assumptions)
+    """
+
+    def __init__(self, ctl):
+        self.__ctl = ctl
+        self.__indices = {}
+        self.__symbols = []
+        self.__literals = array.array('i')
+        self.__guides = {}
+        self.__all_guides = array.array('i')
+        self.__projections = {}
+        self.__projection_indices = {}
+        # the indices built from the models of this table (see relax.ModelIndex)
+        self.model_indices = {}
+
+    def __len__(self):
+        return len(self.__symbols)
+
+    def index(self, symbol, literal=None):
+        index = self.__indices.get(symbol)
+        if index is None:
+            index = len(self.__symbols)
+            self.__indices[symbol] = index
+            self.__symbols.append(symbol)
+            self.__literals.append(self.__lookup(symbol) if literal is None else literal)
+
+        return index
+
+    def indices(self, symbols):
+        """
+        returns the array of indices of the given symbols, interning new ones
+        """
+        get = self.__indices.get
+        indices = [ get(s) for s in symbols ]
+        if None in indices:
+            indices = [ self.index(s) for s in symbols ]
+
+        return array.array('i', indices)
+
+    def symbols(self, indices):
+        """
+        returns the list of symbols of the given indices
+        """
+        return list(map(self.__symbols.__getitem__, indices))
+
+    def literals(self, indices):
+        """
+        returns the array of program literals of the given indices
+        """
+        return array.array('i', map(self.__literals.__getitem__, indices))
+
+    def projection(self, signatures):
+        """
+        returns the array of indices of all atoms of the ground program with one of the given signatures
+        (triples of name, arity and sign as in clingo.SymbolicAtoms.by_signature), computed once per set of signatures
+        """
+        key = tuple(sorted(set(signatures)))
+        indices = self.__projections.get(key)
+        if indices is None:
+            indices = array.array('i')
+            for name, arity, positive in key:
+                for atom in self.__ctl.symbolic_atoms.by_signature(name, arity, positive):
+                    indices.append(self.index(atom.symbol, atom.literal))
+            self.__projections[key] = indices
+
+        return indices
+
+    def projection_truth(self, is_true):
+        """
+        returns a map from the signatures of each projection computed so far (see projection) to the array 
+        of truth values (0 or 1) of its atoms, as given by the function is_true on program literals
+        """
+        literals = self.__literals
+        return { key: array.array('b', [ is_true(literals[i]) for i in indices ]) 
+                 for key, indices in self.__projections.items() }
+
+    def projection_index(self, signatures):
+        """
+        returns a map from each constant occurring in the atoms of the projection (see projection) to the positions
+        of the atoms containing it, computed once per set of signatures. the positions refer to the projection 
+        of this table, hence the map is kept here and not shared between tables
+        """
+        key = tuple(sorted(set(signatures)))
+        postings = self.__projection_indices.get(key)
+        if postings is None:
+            postings = {}
+            for i, s in enumerate(self.symbols(self.projection(key))):
+                if s.type == clingo.SymbolType.Function:
+                    for c in s.arguments:
+                        postings.setdefault(c, set()).add(i)
+            self.__projection_indices[key] = postings
+
+        return postings
+
+    def rebind(self, ctl):
+        """
+        looks up the literals of all interned symbols in the given control, which holds the same program.
+        the guides of the former control are dropped
+        """
+        self.__ctl = ctl
+        self.__literals = array.array('i', map(self.__lookup, self.__symbols))
+        self.__guides = {}
+        self.__all_guides = array.array('i')
+
+    def guides(self, literals):
+        """
+        returns the array of guide literals of the given literals. a guide is a free external atom, which
+        if assumed lets the domain heuristic decide its literal first and to the sign of the literal.
+        missing guides are added to the program of the control
+        """
+        missing = [ l for l in set(literals) if l not in self.__guides ]
+        if missing:
+            with self.__ctl.backend() as backend:
+                for literal in missing:
+                    guide = backend.add_atom()
+                    backend.add_external(guide, TruthValue.Free)
+                    backend.add_heuristic(abs(literal), HeuristicType.Sign, 1 if literal > 0 else -1, 0, [guide])
+                    backend.add_heuristic(abs(literal), HeuristicType.Level, 1, 0, [guide])
+                    self.__guides[literal] = guide
+                    self.__all_guides.append(guide)
+
+        return array.array('i', map(self.__guides.__getitem__, literals))
+
+    def guide_assumptions(self, literals):
+        """
+        returns assumptions guiding the solver towards the given literals (see guides) without enforcing them,
+        all other guides are assumed to be false
+        """
+        guides = self.guides(literals)
+        selected = set(guides)
+        guides.extend([ -g for g in self.__all_guides if g not in selected ])
+
+        return guides
+
+    def __lookup(self, symbol):
+        atom = self.__ctl.symbolic_atoms[symbol]
+        return -1 if atom is None else atom.literal
+
+
+class CostObserver(Observer):
+    """
+    records the literals of the minimize statements of the ground program (including weak constraints) 
+    with their weights and priorities, and for each positive minimize literal the positive body literals 
+    of the rules deriving it, e.g. the atoms of the body of a weak constraint
+    """
+
+    def __init__(self):
+        self.priorities = array.array('i')
+        self.weights = array.array('i')
+        self.literals = array.array('i')
+        self.bodies = {}
+        self.__rules = {}
+
+    def __len__(self):
+        return len(self.literals)
+
+    def rule(self, choice, head, body):
+        if not choice and len(head) == 1:
+            self.__rules.setdefault(head[0], []).append(body)
+
+    def minimize(self, priority, literals):
+        for literal, weight in literals:
+            self.priorities.append(priority)
+            self.weights.append(weight)
+            self.literals.append(literal)
+
+    def end_step(self):
+        # only the rules of the minimize literals are kept
+        for literal in self.literals:
+            if literal in self.__rules:
+                self.bodies[literal] = [ l for body in self.__rules[literal] for l in body if l > 0 ]
+        self.__rules = {}
+
+
+class DependencyObserver(Observer):
+    """
+    records which atoms occur together in the rules of the ground program, as a hypergraph with an edge per
+    rule over its atoms. rules with more than max_edge_size atoms are skipped, as they would connect most of 
+    the program. after each grounding step, the incidences of the atoms are stored in compressed sparse row 
+    arrays, i.e. the edges of atom a are atom_edges[atom_offsets[a]:atom_offsets[a + 1]]
+    """
+
+    def __init__(self, max_edge_size=64):
+        self.__max_edge_size = max_edge_size
+        self.edge_offsets = array.array('i', [ 0 ])
+        self.edge_atoms = array.array('i')
+        self.atom_offsets = array.array('i', [ 0 ])
+        self.atom_edges = array.array('i')
+
+    def __add_edge(self, atoms):
+        if 1 < len(atoms) <= self.__max_edge_size:
+            self.edge_atoms.extend(atoms)
+            self.edge_offsets.append(len(self.edge_atoms))
+
+    def rule(self, choice, head, body):
+        self.__add_edge(list(head) + [ abs(l) for l in body ])
+
+    def weight_rule(self, choice, head, lower_bound, body):
+        self.__add_edge(list(head) + [ abs(l) for l, _ in body ])
+
+    def end_step(self):
+        atom_count = max(self.edge_atoms, default=0) + 1
+
+        offsets = array.array('i', bytes(4 * (atom_count + 1)))
+        for a in self.edge_atoms:
+            offsets[a + 1] += 1
+        for a in range(atom_count):
+            offsets[a + 1] += offsets[a]
+
+        edges = array.array('i', bytes(4 * len(self.edge_atoms)))
+        free = array.array('i', offsets)
+        for e in range(len(self.edge_offsets) - 1):
+            for a in self.edge_atoms[self.edge_offsets[e]:self.edge_offsets[e + 1]]:
+                edges[free[a]] = e
+                free[a] += 1
+
+        self.atom_offsets = offsets
+        self.atom_edges = edges
+
+    def edges(self, atom):
+        """
+        returns the edges (rules) the given atom occurs in
+        """
+        if atom + 1 >= len(self.atom_offsets):
+            return self.atom_edges[0:0]
+        return self.atom_edges[self.atom_offsets[atom]:self.atom_offsets[atom + 1]]
+
+    def atoms(self, edge):
+        """
+        returns the atoms of the given edge
+        """
+        return self.edge_atoms[self.edge_offsets[edge]:self.edge_offsets[edge + 1]]
+
+
+def parse_program(inputstring):
+    """
+    returns the list of statements of the given program (see Clingo.load_statements)
+    """
+    statements = []
+    clingo.ast.parse_string(inputstring, callback=statements.append)
+
+    return statements
+
+
+class CompactModel(argparse.Namespace):
+    """
+    a model storing its shown atoms as an array of indices into an AtomTable (attributes atoms and indices)
+    instead of a list of symbols, the symbols are only created on access
+    """
+
+    @property
+    def shown(self):
+        return self.atoms.symbols(self.indices)
+
+
 class Clingo:
     """ 
     presents the the api of clingo.Control in a different way.
@@ -49,12 +313,46 @@ class Clingo:
             if m != clingo.MessageCode.Other:
                 print(msg, file=sys.stderr)
 
+        self._clingoargs = clingoargs
+        self._message_logger = my_logger
         self._ctl = clingo.control.Control(clingoargs, logger=my_logger)
 
         self._theory = theory
         if self._theory is not None:
             self._theory.register(self._ctl)
 
+        self._atoms = AtomTable(self._ctl)
+
+        # statements of the program (before theory rewriting) and the current bound, kept for recycle()
+        self._statements = []
+        self._bound = None
+
+        self._capture = config.CAPTURE_FULL
+        self._declarative_atoms = None
+        self._minimize = None
+        self._graph = None
+
+        # timings of this solver and clasp counters of recycled controls
+        self._statistics = { 'modelCopyTime': 0.0, 'boundTime': 0.0, 'conflicts': 0, 'choices': 0, 'restarts': 0 }
+        self._collect_statistics = False
+
+    def set_capture_policy(self, policy):
+        """
+        sets which symbols are copied out of clingo for every found model:
+         - CAPTURE_SHOWN ... only the shown symbols
+         - CAPTURE_PROJECTION ... the shown symbols and the truth values of the atoms of the projections
+           computed so far (see AtomTable.projection_truth)
+         - CAPTURE_DECLARATIVE ... the shown symbols, the truth values of the projections and the atoms 
+           of the lns selection predicates
+         - CAPTURE_FULL ... the shown symbols, the truth values of the projections and all atoms, 
+           terms and theory symbols
+        """
+        if policy not in config.CAPTURE_POLICIES:
+            raise ValueError('unknown capture policy "%s"' % policy)
+
+        logger.debug('model capture policy: %s', policy)
+        self._capture = policy
+
     def supports_native_opt(self):
         return True
 
@@ -72,18 +370,184 @@ class Clingo:
         see clingo.Model, the return value somewhat mirrors it.
         """
         # logger.debug("rawmodel: %s", rawmodel) (this messes up output in interactive mode)
-        model = argparse.Namespace()
+        model = CompactModel()
         model.cost = rawmodel.cost.copy()
         model.number = rawmodel.number
         model.optimality_proven = rawmodel.optimality_proven
         model.thread_id = rawmodel.thread_id
         model.type = rawmodel.type
-        model.symbols = list(rawmodel.symbols(atoms=True, terms=True, theory=True)).copy()
-        model.shown = list(rawmodel.symbols(shown=True)).copy()
+        model.atoms = self._atoms
+        model.indices = self._atoms.indices(rawmodel.symbols(shown=True))
+        if self._capture == config.CAPTURE_FULL:
+            model.symbols = list(rawmodel.symbols(atoms=True, terms=True, theory=True))
+        elif self._capture == config.CAPTURE_DECLARATIVE:
+            model.symbols = self._declarative_symbols(rawmodel)
+        else:
+            model.symbols = []
+        model.projections = None
+        if self._capture != config.CAPTURE_SHOWN:
+            model.projections = self._atoms.projection_truth(rawmodel.is_true)
         model.assignments = {}
+        model.graph = self._graph
+        model.minimize = self._minimize
+        model.violations = None
+        if self._minimize is not None:
+            is_true = rawmodel.is_true
+            model.violations = array.array('i', [ i for i, l in enumerate(self._minimize.literals) if is_true(l) ])
 
         return model
 
+    def _declarative_symbols(self, rawmodel):
+        """
+        returns the true atoms and shown terms of rawmodel matching the lns selection predicates.
+
+        the candidate atoms are looked up once in the symbolic atoms of the ground program, 
+        hence only the matching symbols are copied for each model.
+        """
+        signatures = [ (config.SELECT_PRED, 1), (config.SELECT_PRED, 2), (config.FIX_PRED, 2), (config.FIX_PRED, 3) ]
+
+        if self._declarative_atoms is None:
+            self._declarative_atoms = []
+            for name, arity in signatures:
+                for atom in self._ctl.symbolic_atoms.by_signature(name, arity):
+                    self._declarative_atoms.append((atom.symbol, atom.literal))
+
+        symbols = [ s for s, l in self._declarative_atoms if rawmodel.is_true(l) ]
+        for s in rawmodel.symbols(terms=True):
+            if any(s.match(name, arity) for name, arity in signatures):
+                symbols.append(s)
+
+        return symbols
+
+    def export_solution(self, solution):
+        """
+        returns a pickleable copy of the given solution where all symbols are converted to strings
+        (see parse_solution)
+        """
+        model = { k: v for k, v in vars(solution.model).items()
+                  if k not in ('type', 'shown', 'symbols', 'atoms', 'indices', 'projections', 'graph', 'minimize', 'violations') }
+        model['shown'] = [ str(s) for s in solution.model.shown ]
+        model['symbols'] = [ str(s) for s in solution.model.symbols ]
+
+        return { 'sat': solution.sat, 'cost': solution.cost, 'exhausted': solution.exhausted, 'core': None,
+                 'model': model }
+
+    def import_solution(self, data):
+        """
+        returns a solution from the output of export_solution (possibly of another solver instance)
+        """
+        solution = parse_solution(data)
+
+        model = CompactModel(**{ k: v for k, v in vars(solution.model).items() if k != 'shown' })
+        model.atoms = self._atoms
+        model.indices = self._atoms.indices(solution.model.shown)
+        # the truth values of the hidden atoms are not transferred
+        model.projections = None
+        model.graph = self._graph
+        model.minimize = self._minimize
+        model.violations = None
+        solution.model = model
+
+        return solution
+
+    def literals(self, symbols):
+        """
+        returns the program literals of the given symbols, e.g. to use them as assumptions (see solve)
+        """
+        return self._atoms.literals(self._atoms.indices(symbols))
+
+    def relink_solution(self, solution):
+        """
+        returns a copy of the given solution, required for solutions found before a recycle 
+        as the literals of their atoms may be cached
+        """
+        model = CompactModel(**vars(solution.model))
+        # the atoms and minimize literals of the former control are not known anymore
+        model.graph = self._graph
+        model.minimize = self._minimize
+        model.violations = None
+
+        relinked = argparse.Namespace(**vars(solution))
+        relinked.model = model
+        return relinked
+
+    def set_bound(self, cost):
+        """
+        bounds subsequent solve calls to solutions with a cost less than the given one
+        """
+        self._tighten_bound(cost)
+
+    def add_projection(self, signatures):
+        """
+        computes the projection of the given signatures (see AtomTable.projection) after grounding, hence the 
+        truth values of its atoms are captured from all following models (see set_capture_policy)
+        """
+        self._atoms.projection(signatures)
+
+    def enable_guidance(self):
+        """
+        enables the domain heuristic of clasp, which is required for the guides of soft neighbourhoods
+        (see AtomTable.guides)
+        """
+        if '--heuristic=Domain' in self._clingoargs:
+            return
+
+        self._clingoargs.append('--heuristic=Domain')
+        self._configure({ 'heuristic': 'Domain' })
+
+    def enable_cost_observer(self):
+        """
+        records the minimize statements of the ground program and which of their literals are true in each 
+        model (see CostObserver), required by cost guided relax operators. has to be enabled before grounding
+        """
+        if self._minimize is not None:
+            return
+
+        self._minimize = CostObserver()
+        self._ctl.register_observer(self._minimize)
+
+    def enable_dependency_graph(self):
+        """
+        records which atoms occur together in the rules of the ground program (see DependencyObserver),
+        required by structure aware relax operators. has to be enabled before grounding
+        """
+        if self._graph is not None:
+            return
+
+        self._graph = DependencyObserver()
+        self._ctl.register_observer(self._graph)
+
+    def enable_statistics(self):
+        """
+        lets clasp accumulate its statistics over all solve calls, required for the counters of get_statistics
+        """
+        self._collect_statistics = True
+        self._ctl.configuration.stats = '1'
+
+    def get_statistics(self):
+        """
+        returns the statistics accumulated over all solve calls of this solver: the time spent on copying
+        models (modelCopyTime) and on adding bounds (boundTime) in seconds and the number of conflicts,
+        choices and restarts of clasp (only counted after enable_statistics)
+        """
+        statistics = dict(self._statistics)
+        for key, value in self._clasp_statistics().items():
+            statistics[key] += value
+
+        return statistics
+
+    def _clasp_statistics(self):
+        if not self._collect_statistics or 'accu' not in self._ctl.statistics:
+            return {}
+
+        solvers = self._ctl.statistics['accu']['solving']['solvers']
+        return { key: int(solvers[key]) for key in ('conflicts', 'choices', 'restarts') }
+
+    def _tighten_bound(self, bound):
+        start_time = time.time()
+        self._add_bound_less_than(bound)
+        self._statistics['boundTime'] += time.time() - start_time
+
     def _read_cost(self, model):
         assert model
         if len(model.cost) == 1:
@@ -106,14 +570,26 @@ class Clingo:
              - model
                 None ... no answer set was found
                 Model ... the found answer set
+             - core
+                None ... no unsatisfiable core is known
+                list ... program literals of the assumptions responsible for unsatisfiability
         """
         sol = argparse.Namespace()
         sol.sat = result.satisfiable if result else None
         sol.cost = self._read_cost(model) if model else None
         sol.model = model
         sol.exhausted = result.exhausted if result else None
+        sol.core = None
         return sol
 
+    def core_atoms(self, core, assumptions):
+        """
+        returns the literals of the given assumptions which are part of the unsatisfiable core
+        (see the core attribute of a solution)
+        """
+        literals = set(core)
+        return [ l for l in assumptions if l in literals ]
+
     def _ast_visitor(self, ast, pb):
         """
         called on the addition of a new ast node to the program
@@ -129,7 +605,7 @@ class Clingo:
         with clingo.ast.ProgramBuilder(self._ctl) as pb:
             def callback(ast):
                 self._ast_visitor(ast, pb)
-                self._theory.rewrite_ast(ast, pb.add) if self._theory else pb.add(ast)
+                self._add_statement(pb, ast)
 
             clingo.ast.parse_files(
                 files=inputfiles,
@@ -144,24 +620,136 @@ class Clingo:
         with clingo.ast.ProgramBuilder(self._ctl) as pb:
             def callback(ast):
                 self._ast_visitor(ast, pb)
-                self._theory.rewrite_ast(ast, pb.add) if self._theory else pb.add(ast)
+                self._add_statement(pb, ast)
 
             clingo.ast.parse_string(
                 inputstring,
                 callback=callback)
 
+    def load_statements(self, statements):
+        """
+        adds the given statements of a program parsed before (see parse_program), hence a program
+        shared by several solvers is only parsed once
+        """
+        logger.debug("loading %i statements" % len(statements))
+
+        with clingo.ast.ProgramBuilder(self._ctl) as pb:
+            for ast in statements:
+                self._ast_visitor(ast, pb)
+                self._add_statement(pb, ast)
+
+    def _add_statement(self, pb, ast):
+        """
+        adds the statement to the program (rewritten by the theory if there is one) and keeps it for recycle()
+        """
+        self._statements.append(ast)
+        self._theory.rewrite_ast(ast, pb.add) if self._theory else pb.add(ast)
+
+    def recycle(self):
+        """
+        replaces the clingo.Control by a fresh one holding the same program. the kept statements are 
+        grounded again and the current bound is reinstated, whereas learnt nogoods, heuristic state 
+        and the ground instances of former bounds are dropped.
+        """
+        logger.debug('recycling control')
+
+        for key, value in self._clasp_statistics().items():
+            self._statistics[key] += value
+
+        self._ctl = clingo.control.Control(self._clingoargs, logger=self._message_logger)
+        if self._collect_statistics:
+            self._ctl.configuration.stats = '1'
+        if self._theory is not None:
+            self._theory = type(self._theory)()
+            self._theory.register(self._ctl)
+        if self._minimize is not None:
+            self._minimize = CostObserver()
+            self._ctl.register_observer(self._minimize)
+        if self._graph is not None:
+            self._graph = DependencyObserver()
+            self._ctl.register_observer(self._graph)
+
+        with clingo.ast.ProgramBuilder(self._ctl) as pb:
+            for ast in self._statements:
+                self._theory.rewrite_ast(ast, pb.add) if self._theory else pb.add(ast)
+
+        self.ground()
+        self._atoms.rebind(self._ctl)
+        if self._bound is not None:
+            self._add_bound_less_than(self._bound)
+
     def ground(self):
         """
         see clingo.Control.ground([("base", [])])
         """
         logger.debug("grounding 'base'")
         self._ctl.ground([("base", [])])
+        self._declarative_atoms = None
 
     def _collect_models_on_model(self, rawmodel, models):
+        """
+        copies rawmodel into models, which keeps only the last model and the number of models
+        """
         if self._theory:
             self._theory.on_model(model=rawmodel)
 
-        models.append(self._make_model(rawmodel))
+        start_time = time.time()
+        models.last = self._make_model(rawmodel)
+        models.count += 1
+        self._statistics['modelCopyTime'] += time.time() - start_time
+
+    def parse_arguments(self, arguments):
+        """
+        returns the configuration settings for a string of command-line arguments 
+        (e.g. "--heuristic=Domain --restarts=L,100").
+
+        only options of the solver and solve groups can be used, as these can be changed 
+        between solve calls of the same grounded program. the number of models and the 
+        optimization mode are managed by the solver itself.
+        """
+        settings = {}
+        conf = self._ctl.configuration
+        for argument in arguments.split():
+            if not argument.startswith('--') or '=' not in argument:
+                raise ValueError('solver argument "%s" is not of the form --<option>=<value>' % argument)
+
+            key, value = argument[2:].split('=', 1)
+            key = key.replace('-', '_')
+            if key in ('models', 'opt_mode') or (key not in conf.solver.keys and key not in conf.solve.keys):
+                raise ValueError('solver argument "%s" cannot be changed between solve calls' % argument)
+
+            settings[key] = value
+
+        return settings
+
+    def _configure(self, settings):
+        """
+        applies the given configuration settings (see parse_arguments) to all solver threads 
+        and returns the replaced values
+        """
+        replaced = []
+        if not settings:
+            return replaced
+
+        conf = self._ctl.configuration
+        for key, value in settings.items():
+            if key in conf.solve.keys:
+                targets = [ conf.solve ]
+            else:
+                targets = [ conf.solver[i] for i in range(len(conf.solver)) ]
+
+            for target in targets:
+                replaced.append((target, key, getattr(target, key)))
+                setattr(target, key, value)
+
+        return replaced
+
+    def _restore(self, replaced):
+        """
+        restores the configuration values replaced by _configure
+        """
+        for target, key, value in reversed(replaced):
+            setattr(target, key, value)
 
     def _add_bound_less_than(self, bound):
         """
@@ -169,6 +757,7 @@ class Clingo:
         """
         assert bound is not None
         assert type(bound) == list or type(bound) == int
+        self._bound = bound
 
         bound_eff = None
         if type(bound) == list:
@@ -181,26 +770,27 @@ class Clingo:
 
         self._ctl.configuration.solve.opt_mode = 'opt, ' + ', '.join([str(b) for b in bound_eff])
 
-    def solve(self, assumptions=[], timelimit=None, modellimit=None, strict_bound=True):
+    def solve(self, assumptions=[], timelimit=None, modellimit=None, strict_bound=True, settings=None):
         """
         Args:
-          assumptions ... iterable of symbols to assume to be true. en
-              empty array is equivalent to no assumptions.
+          assumptions ... list of program literals to assume (see literals). an
+              empty list is equivalent to no assumptions.
           timelimit ... time limit in seconds. clingo.Control will be kindly
               asked to take no more than this amount of seconds to return.
               The time limit is not externally enforced.
               A value of ``None`` means no time limit.
           modellimit ... the maximal number of models returned by the solver
               (default = None)
+          settings ... configuration settings applied for this call only
+              (see parse_arguments, default = None)
 
         Returns:
             a solution or None if timelimit exceeded
         """
-        # execute solve, and keep a copy of all models.
-        models = []
+        # execute solve, and keep a copy of the last model.
+        models = argparse.Namespace(count=0, last=None)
         on_model = lambda rawmodel: self._collect_models_on_model(
             rawmodel, models)
-        assmpts = [(s, True) for s in assumptions]
         result = None
 
         n_models = 0
@@ -208,36 +798,47 @@ class Clingo:
             n_models = modellimit
 
         self._ctl.configuration.solve.models = n_models
-        with self._ctl.solve(
-                async_=True,
-                assumptions=assmpts,
-                on_model=on_model
-        ) as solveHandle:
-
-            finished = solveHandle.wait(timelimit)
-            if not finished:
-                solveHandle.cancel()
-
-            result = solveHandle.get()
-            # print(result)
+        replaced = self._configure(settings)
+        try:
+            with self._ctl.solve(
+                    async_=True,
+                    assumptions=assumptions,
+                    on_model=on_model
+            ) as solveHandle:
+
+                finished = solveHandle.wait(timelimit)
+                if not finished:
+                    solveHandle.cancel()
+
+                result = solveHandle.get()
+                # print(result)
+                core = solveHandle.core() if result.unsatisfiable else None
+        finally:
+            self._restore(replaced)
+
+        # a search cancelled while checking the assumptions may report unsat with an empty core
+        if result is not None and result.unsatisfiable and result.interrupted:
+            result = None
 
         if result is not None and not result.unknown:
             if not result.satisfiable:
                 # solve() determined UNSAT
-                assert 0 == len(models)
-                return self._make_solution(result=result, model=None)
+                assert 0 == models.count
+                solution = self._make_solution(result=result, model=None)
+                solution.core = core
+                return solution
             else:
                 # => some result&model was found within timelimit
                 assert result.satisfiable is True
-                assert 1 <= len(models)
-                model = models[len(models) - 1]
+                assert 1 <= models.count
+                model = models.last
                 solution = self._make_solution(result=result, model=model)
                 bound = None
                 if strict_bound:
                     bound = solution.cost
                 else:
                     bound = solution.cost + 1
-                self._add_bound_less_than(bound)
+                self._tighten_bound(bound)
                 return solution
         else:
             # timeout
@@ -248,6 +849,11 @@ class Clingo:
 
 class ClingoDl(Clingo):
 
+    # the bound is encoded by a chain of difference constraints switched by external bits, covering
+    # the bounds from -BOUND_OFFSET to 2**BOUND_BITS - BOUND_OFFSET - 1
+    BOUND_BITS = 30
+    BOUND_OFFSET = 2**29
+
     def __init__(self, *, options=None, seed=None, minimize_variable=None,
                  heuristic=None, forget_on_shot=False):
 
@@ -258,13 +864,48 @@ class ClingoDl(Clingo):
         self._minimize_variable = minimize_variable
 
         if self._minimize_variable:
-            # if there is a minimization objective, we add the bound program module
+            # if there is a minimization objective, we add the bound chain and the bound program module
+            # (the latter is only used for bounds outside of the range of the chain)
             self._bound_id = 0
-            part = f"#program bound(b). &diff {{ {self._minimize_variable} - 0 }} <= b."
+            part = self._bound_chain() + f"#program bound(b). &diff {{ {self._minimize_variable} - 0 }} <= b."
             with clingo.ast.ProgramBuilder(self._ctl) as pb:
                 clingo.ast.parse_string(
                     program=part,
-                    callback=lambda ast: self._theory.rewrite_ast(ast, pb.add))
+                    callback=lambda ast: self._add_statement(pb, ast))
+
+    def _bound_chain(self):
+        """
+        returns a program bounding the minimize_variable by the value of the variable __alaspo_bound(BOUND_BITS),
+        which is the sum of -BOUND_OFFSET and 2**i for each true external __alaspo_bound_bit(i).
+        the bound is only active if the external __alaspo_bounded is true.
+        a second chain bounds the minimize_variable by __alaspo_cut(BOUND_BITS), the highest bound of the range
+        minus 2**i for each true external __alaspo_cut_bit(i), while the external __alaspo_cutting is true. 
+        its bits are left free during a solve call and forced by clauses added after each model (see _cut_clauses), 
+        hence the bound is tightened without restarting the solve call
+        """
+        lines = [ '#external __alaspo_bounded.' ]
+        lines.append(f'&diff {{ __alaspo_bound(0) - 0 }} <= -{self.BOUND_OFFSET}.')
+        for i in range(self.BOUND_BITS):
+            lines.append(f'#external __alaspo_bound_bit({i}).')
+            lines.append(f'&diff {{ __alaspo_bound({i + 1}) - __alaspo_bound({i}) }} <= {2**i} '
+                         f':- __alaspo_bound_bit({i}).')
+            lines.append(f'&diff {{ __alaspo_bound({i + 1}) - __alaspo_bound({i}) }} <= 0 '
+                         f':- not __alaspo_bound_bit({i}).')
+        lines.append(f'&diff {{ {self._minimize_variable} - __alaspo_bound({self.BOUND_BITS}) }} <= 0 '
+                     f':- __alaspo_bounded.')
+
+        lines.append('#external __alaspo_cutting.')
+        lines.append(f'&diff {{ __alaspo_cut(0) - 0 }} <= {2**self.BOUND_BITS - self.BOUND_OFFSET - 1}.')
+        for i in range(self.BOUND_BITS):
+            lines.append(f'#external __alaspo_cut_bit({i}).')
+            lines.append(f'&diff {{ __alaspo_cut({i + 1}) - __alaspo_cut({i}) }} <= -{2**i} '
+                         f':- __alaspo_cut_bit({i}).')
+            lines.append(f'&diff {{ __alaspo_cut({i + 1}) - __alaspo_cut({i}) }} <= 0 '
+                         f':- not __alaspo_cut_bit({i}).')
+        lines.append(f'&diff {{ {self._minimize_variable} - __alaspo_cut({self.BOUND_BITS}) }} <= 0 '
+                     f':- __alaspo_cutting.')
+
+        return '\n'.join(lines) + '\n'
 
     def _make_model(self, rawmodel):
         model = super()._make_model(rawmodel)
@@ -272,6 +913,8 @@ class ClingoDl(Clingo):
         model.assignments = {}
         dl_assignments = []
         for dl_variable, dl_value in self._theory.assignment(rawmodel.thread_id):
+            if dl_variable.match('__alaspo_bound', 1) or dl_variable.match('__alaspo_cut', 1):
+                continue
             dl_assignments.append((str(dl_variable), dl_value))
         dl_assignments.sort()
         for dl_variable, dl_value in dl_assignments:
@@ -301,94 +944,169 @@ class ClingoDl(Clingo):
         the minimize_variable (as named when invoking the constructor)
         MUST be LESS than the specified bound.
 
-        this effect is currently  implemented via an additional difference
-        constraint: ``&diff {variable - 0} <= boundeff.``
+        this effect is implemented by setting the externals of the bound chain
+        (see _bound_chain), hence the ground program does not grow with each new
+        bound. only bounds outside of the range of the chain are added as an
+        additional difference constraint: ``&diff {variable - 0} <= boundeff.``
         In order to get "less-than" semantics while clingo-dl only supports
         the ``<=`` operator, the effective bound is: ``boundeff = bound - 1``
         """
         assert None != self._minimize_variable, ("cannot add a bound "
                                                  "without minimize_variable specified to constructor!")
         assert bound is not None
+        self._bound = bound
         boundeff = bound - 1
-        # ground new bound
-        self._ctl.ground([('bound', [Number(boundeff)])])
+
+        value = boundeff + self.BOUND_OFFSET
+        if 0 <= value < 2**self.BOUND_BITS:
+            for i in range(self.BOUND_BITS):
+                self._ctl.assign_external(Function('__alaspo_bound_bit', [Number(i)]), bool((value >> i) & 1))
+            self._ctl.assign_external(Function('__alaspo_bounded'), True)
+        else:
+            # ground new bound
+            self._ctl.ground([('bound', [Number(boundeff)])])
+
         logger.debug('added bound: ' + str(boundeff))
 
+    def _cut_clauses(self, bound):
+        """
+        returns the clauses (lists of symbolic literals) forcing the bits of the second bound chain 
+        (see _bound_chain) such that the minimize_variable is LESS than the given bound, or None if the 
+        bound is outside of the range of the chain. the bits have to encode a number of at least 
+        decrease = highest bound - (bound - 1), for each bit set in decrease one of the bits at the same 
+        or a more significant position which are not set in decrease has to be true
+        """
+        decrease = 2**self.BOUND_BITS - self.BOUND_OFFSET - bound
+        if not 0 <= decrease < 2**self.BOUND_BITS:
+            return None
+
+        bit = lambda i: (Function('__alaspo_cut_bit', [Number(i)]), True)
+        clauses = []
+        for i in range(self.BOUND_BITS):
+            if (decrease >> i) & 1:
+                clauses.append([ bit(i) ] + [ bit(j) for j in range(i + 1, self.BOUND_BITS) if not (decrease >> j) & 1 ])
+
+        return clauses
+
+    def _set_cutting(self, cutting):
+        """
+        activates the second bound chain with free bits or deactivates it (see _bound_chain)
+        """
+        for i in range(self.BOUND_BITS):
+            self._ctl.assign_external(Function('__alaspo_cut_bit', [Number(i)]), None if cutting else False)
+        self._ctl.assign_external(Function('__alaspo_cutting'), cutting)
+
     def supports_native_opt(self):
         return False
 
-    def solve(self, assumptions=[], timelimit=None, modellimit=None, strict_bound=True):
+    def solve(self, assumptions=[], timelimit=None, modellimit=None, strict_bound=True, settings=None):
         logger.debug("solving for %is" % timelimit)
 
         if not self._minimize_variable:
             logger.debug('falling back to default clingo solve')
             # no clingo-dl minimization, defaulting to standard clingo solve
-            return super().solve(assumptions=assumptions, timelimit=timelimit, modellimit=modellimit)
-        else:
-            self._ctl.configuration.solve.models = 1
+            return super().solve(assumptions=assumptions, timelimit=timelimit, modellimit=modellimit,
+                                 settings=settings)
 
-            models = []
-            on_model = lambda rawmodel: self._collect_models_on_model(
-                rawmodel, models)
-            assmpts = [(s, True) for s in assumptions]
-            result = None
-            solution = None
+        replaced = self._configure(settings)
+        try:
+            return self._solve_bounded(assumptions, timelimit, modellimit, strict_bound)
+        finally:
+            self._restore(replaced)
 
-            starttime = self._timestamp()
-            endtime = None
-            if timelimit:
-                endtime = starttime + timelimit
+    def _solve_bounded(self, assumptions, timelimit, modellimit, strict_bound):
+        """
+        solves for up to modellimit models, tightening the bound on the minimize_variable after each model.
+        unless a single model is requested, the bound is tightened within the solve call by the clauses 
+        of _cut_clauses. the solve call is only restarted for bounds outside of the range of the chain
+        """
+        self._ctl.configuration.solve.models = 0
+        cutting = modellimit is None or modellimit > 1
 
-            logger.debug("starttime: %s", starttime)
-            logger.debug("endtime: %s", endtime)
+        models = argparse.Namespace(count=0, last=None, bound=None, restart=False)
 
-            result = None
-            solution = None
-            while (result is None or result.satisfiable) and (modellimit is None or len(models) < modellimit):
-                nowtime = self._timestamp()
-                if endtime:
-                    timeleft = endtime - nowtime
-                else:
-                    timeleft = None
+        def on_model(rawmodel):
+            self._collect_models_on_model(rawmodel, models)
+            cost = self._read_cost(models.last)
+            models.bound = cost if strict_bound else cost + 1
+            if modellimit is not None and models.count >= modellimit:
+                return False
+
+            clauses = self._cut_clauses(models.bound) if cutting else None
+            if clauses is None:
+                # the bound is installed by a new solve call
+                models.restart = True
+                return False
+
+            for clause in clauses:
+                rawmodel.context.add_clause(clause)
+            return True
+
+        starttime = self._timestamp()
+        endtime = None
+        if timelimit:
+            endtime = starttime + timelimit
 
+        logger.debug("starttime: %s", starttime)
+        logger.debug("endtime: %s", endtime)
+
+        result = None
+        core = None
+        finished = True
+        while finished:
+            nowtime = self._timestamp()
+            if endtime:
+                timeleft = endtime - nowtime
+            else:
+                timeleft = None
+
+            models.restart = False
+            if cutting:
+                self._set_cutting(True)
+            try:
                 with self._ctl.solve(
                         async_=True,
-                        assumptions=assmpts,
+                        assumptions=assumptions,
                         on_model=on_model
                 ) as solveHandle:
 
-                    if solveHandle.wait(timeleft):
+                    finished = solveHandle.wait(timeleft)
+                    if finished:
                         # not a timeout => retrieve the result
                         result = solveHandle.get()
                         assert result is not None
-                        if result.satisfiable:
-                            assert 1 <= len(models)
-                            solution = self._make_solution(result=result, model=models[len(models) - 1])
-                            if strict_bound:
-                                bound = solution.cost
-                            else:
-                                bound = solution.cost + 1
-                            self._add_bound_less_than(bound)
+                        if result.unsatisfiable:
+                            core = solveHandle.core()
                     else:
                         solveHandle.cancel()
-                        break
-            
-            if None != result:
-                if result.satisfiable is False and len(models) == 0:
-                    # UNSAT under given assumptions
-                    return self._make_solution(result=result, model=None)
-                else:
-                    # there has to be some solution
-                    assert solution is not None
-                    if result.satisfiable is False:
-                        solution.exhausted = True
+            finally:
+                if cutting:
+                    self._set_cutting(False)
+
+            # the bound of the last model is kept for the following solve calls
+            if models.bound is not None and models.bound != self._bound:
+                self._tighten_bound(models.bound)
+
+            if not models.restart:
+                break
+
+        if models.count == 0:
+            if finished:
+                # UNSAT under given assumptions
+                solution = self._make_solution(result=result, model=None)
+                solution.core = core
+                return solution
 
-                    return solution
-            else:
-                # timeout
-                # Note: even if `models` contains some solution, it arrived
-                # due to a race after the time was up.
-                return self._make_solution(result=None, model=None)
+            # timeout
+            return self._make_solution(result=None, model=None)
+
+        # there has to be some solution, the last one is the best
+        solution = self._make_solution(result=None, model=models.last)
+        solution.sat = True
+        # an exhausted search found no better model than the last one
+        solution.exhausted = finished and result.exhausted
+
+        return solution
 
 
 class Clingcon(Clingo):
@@ -413,14 +1131,20 @@ class Clingcon(Clingo):
         for csp_variable, csp_value in csp_assignments:
             model.assignments[str(csp_variable)] = csp_value
 
+        # the cost is added by the theory, so it does not depend on the capture policy
+        model.csp_cost = None
+        for s in rawmodel.symbols(theory=True):
+            if s.match('__csp_cost', 1):
+                model.csp_cost = int(s.arguments[0].string)
+                break
+
         return model
 
     def _read_cost(self, model):
         assert model
 
-        for s in model.symbols:
-            if s.match('__csp_cost', 1):
-                return int(s.arguments[0].string)
+        if model.csp_cost is not None:
+            return model.csp_cost
 
         return super()._read_cost(model)
 
@@ -449,13 +1173,52 @@ class Clingcon(Clingo):
                                                clingo.ast.SymbolicTerm(loc, clingo.symbol.Function('b', [], True)))
                 sum_atom = clingo.ast.TheoryAtom(loc, term, sequence, guard=guard)
                 rule = clingo.ast.Rule(loc, sum_atom, [])
-                self._theory.rewrite_ast(program, pb.add)
-                self._theory.rewrite_ast(rule, pb.add)
+                self._add_statement(pb, program)
+                self._add_statement(pb, rule)
 
     def _add_bound_less_than(self, bound):
         if self._minimize_atom:
+            self._bound = bound
             boundeff = bound - 1
             # ground new bound
             self._ctl.ground([('bound', [Number(boundeff)])])
         else:
             super()._add_bound_less_than(bound)
+
+
+def parse_solution(data):
+    """
+    returns a solution from the output of Clingo.export_solution
+    """
+    model = argparse.Namespace(**data['model'])
+    model.type = None
+    model.shown = [ clingo.parse_term(s) for s in data['model']['shown'] ]
+    model.symbols = [ clingo.parse_term(s) for s in data['model']['symbols'] ]
+
+    sol = argparse.Namespace()
+    sol.sat = data['sat']
+    sol.cost = data['cost']
+    sol.model = model
+    sol.exhausted = data['exhausted']
+    sol.core = data['core']
+    return sol
+
+# Solver Factory
+
+def get_solver(type, args):
+    """
+    returns a new internal solver of the given type with given args
+    """
+    options = args.get('options')
+    seed = args.get('seed')
+    forget_on_shot = args.get('forget_on_shot', False)
+
+    if type == 'clingo':
+        return Clingo(options=options, seed=seed, forget_on_shot=forget_on_shot)
+    elif type == 'clingo-dl':
+        return ClingoDl(options=options, minimize_variable=args.get('minimize_variable'),
+                        seed=seed, forget_on_shot=forget_on_shot)
+    elif type == 'clingcon':
+        return Clingcon(options=options, seed=seed, forget_on_shot=forget_on_shot)
+    else:
+        raise ValueError('no solver "%s"' % type)
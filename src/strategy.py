@@ -1,5 +1,6 @@
 
 import random
+import math
 import pprint
 import logging
 
@@ -7,11 +8,91 @@ import config
 
 logger = logging.getLogger('root')
 
+class SumTree():
+    """
+    a binary tree over non-negative weights where each inner node holds the sum of its children.
+    updating a weight and sampling an index proportionally to its weight take O(log n)
+    """
+
+    def __init__(self, weights):
+        self.__size = len(weights)
+        self.__capacity = 1
+        while self.__capacity < self.__size:
+            self.__capacity *= 2
+
+        self.__tree = [0.0] * (2 * self.__capacity)
+        for i, weight in enumerate(weights):
+            self.__tree[self.__capacity + i] = float(weight)
+        for i in range(self.__capacity - 1, 0, -1):
+            self.__tree[i] = self.__tree[2 * i] + self.__tree[2 * i + 1]
+
+    def __len__(self):
+        return self.__size
+
+    def total(self):
+        """
+        returns the sum of all weights
+        """
+        return self.__tree[1]
+
+    def get(self, index):
+        """
+        returns the weight at the given index
+        """
+        return self.__tree[self.__capacity + index]
+
+    def update(self, index, weight):
+        """
+        sets the weight at the given index
+        """
+        i = self.__capacity + index
+        self.__tree[i] = float(weight)
+        i //= 2
+        while i >= 1:
+            self.__tree[i] = self.__tree[2 * i] + self.__tree[2 * i + 1]
+            i //= 2
+
+    def sample(self, rng=random):
+        """
+        returns a random index with a probability proportional to its weight, drawn with the given random number generator
+        """
+        value = rng.random() * self.__tree[1]
+        i = 1
+        while i < self.__capacity:
+            left = 2 * i
+            if value < self.__tree[left] or self.__tree[left + 1] <= 0.0:
+                i = left
+            else:
+                value -= self.__tree[left]
+                i = left + 1
+
+        return i - self.__capacity
+
+
+def flatten_operators(operators):
+    """
+    returns the list of operators where each contains only one of the sizes
+    """
+    flat_operators = []
+    for op in operators:
+        flat_operators += op.flatten()
+
+    return flat_operators
+
+
+def is_improvement(prev_cost, cost):
+    """
+    whether or not the (possibly lexicographic) cost is lower than the previous cost
+    """
+    return cost is not None and prev_cost is not None and cost < prev_cost
+
+
 class AbstractStrategy():
 
-    def prepare(self, relax_operators, search_operators):
+    def prepare(self, relax_operators, search_operators, rng=random):
         """
-        prepares the strategy by providing the (non-empty) lists of relax and search operators.
+        prepares the strategy by providing the (non-empty) lists of relax and search operators and the
+        random number generator the operators are selected with (default the random module).
         needs to be called before the strategy is used
         """
         if relax_operators is None or len(relax_operators) == 0:
@@ -22,6 +103,7 @@ class AbstractStrategy():
 
         self._relax_operators = relax_operators
         self._search_operators = search_operators
+        self._rng = rng
 
     def get_portfolio(self):
         """
@@ -41,6 +123,13 @@ class AbstractStrategy():
         """
         pass
 
+    def predict(self):
+        """
+        returns the relax operator which is likely selected after the current move or None if it cannot be predicted.
+        called while a move is solved, hence the state of the strategy must not be changed
+        """
+        return None
+
     def supports_intensification(self):
         """
         whether or not the strategy supports intensification i.e. if the assumptions+operators are allowed to to be kept until no improvement can be achieved
@@ -48,13 +137,36 @@ class AbstractStrategy():
         """
         return False
 
+    def get_state(self):
+        """
+        returns the json serializable state of the strategy (e.g. for checkpoints), 
+        which contains at least the current sizes of the operators of the portfolio
+        """
+        return { 
+            'relaxSizes': [ op.get_size_index() for op in self._relax_operators ],
+            'searchSizes': [ op.get_size_index() for op in self._search_operators ]
+        }
+
+    def set_state(self, state):
+        """
+        restores a state returned by get_state of a strategy prepared with the same portfolio
+        """
+        if (len(state['relaxSizes']) != len(self._relax_operators) 
+                or len(state['searchSizes']) != len(self._search_operators)):
+            raise ValueError('the state does not match the portfolio of the strategy')
+
+        for op, index in zip(self._relax_operators, state['relaxSizes']):
+            op.set_size_index(index)
+        for op, index in zip(self._search_operators, state['searchSizes']):
+            op.set_size_index(index)
+
 class RandomStrategy(AbstractStrategy):
 
     def __init__(self, supports_intensification=False):
         self.__supports_intensification = supports_intensification
 
-    def prepare(self, relax_operators, search_operators):
-        super().prepare(relax_operators, search_operators)
+    def prepare(self, relax_operators, search_operators, rng=random):
+        super().prepare(relax_operators, search_operators, rng)
 
         relax_operators = []
         for op in self._relax_operators:
@@ -75,8 +187,8 @@ class RandomStrategy(AbstractStrategy):
         """
         returns a random pair of relax and search operator
         """
-        relax_operator = random.choice(self._relax_operators)
-        search_operator = random.choice(self._search_operators)
+        relax_operator = self._rng.choice(self._relax_operators)
+        search_operator = self._rng.choice(self._search_operators)
 
         return relax_operator, search_operator
 
@@ -90,11 +202,11 @@ class DynamicStrategy(AbstractStrategy):
         self.__timeout_strike_limit = timeout_strike_limit
 
 
-    def prepare(self, relax_operators, search_operators):
-        super().prepare(relax_operators, search_operators)
+    def prepare(self, relax_operators, search_operators, rng=random):
+        super().prepare(relax_operators, search_operators, rng)
         
-        self.__current_relax_operator = random.choice(self._relax_operators)
-        self.__current_search_operator = random.choice(self._search_operators)
+        self.__current_relax_operator = self._rng.choice(self._relax_operators)
+        self.__current_search_operator = self._rng.choice(self._search_operators)
 
         self.__unsat_strikes = 0
         self.__timeout_strikes = 0
@@ -107,6 +219,9 @@ class DynamicStrategy(AbstractStrategy):
     def select_operators(self):
         return self.__current_relax_operator, self.__current_search_operator
 
+    def predict(self):
+        # the pair is only changed after several failed moves
+        return self.__current_relax_operator
 
     def on_move_finished(self, operators, prev_cost, result, time_used):   
         if not result.sat:
@@ -124,7 +239,7 @@ class DynamicStrategy(AbstractStrategy):
                 # TIMEOUT
                 self.__timeout_strikes += 1
                 if self.__timeout_strikes >= self.__timeout_strike_limit:
-                        if random.random() > 0.5:
+                        if self._rng.random() > 0.5:
                             # increase search time
                             if not self.__current_search_operator.increase_size():
                                 self.__select_new_pair()
@@ -143,13 +258,28 @@ class DynamicStrategy(AbstractStrategy):
     def supports_intensification(self):
         return True
 
+    def get_state(self):
+        state = super().get_state()
+        state['relaxOperator'] = self._relax_operators.index(self.__current_relax_operator)
+        state['searchOperator'] = self._search_operators.index(self.__current_search_operator)
+        state['unsatStrikes'] = self.__unsat_strikes
+        state['timeoutStrikes'] = self.__timeout_strikes
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.__current_relax_operator = self._relax_operators[state['relaxOperator']]
+        self.__current_search_operator = self._search_operators[state['searchOperator']]
+        self.__unsat_strikes = state['unsatStrikes']
+        self.__timeout_strikes = state['timeoutStrikes']
+
     def __select_new_pair(self):
         logger.debug('selecting new operators')
         if len(self._relax_operators) > 1:
             relax_choices = [ o for o in self._relax_operators if o != self.__current_relax_operator ]
-            self.__current_relax_operator = random.choice(relax_choices)
+            self.__current_relax_operator = self._rng.choice(relax_choices)
 
-        self.__current_search_operator = random.choice(self._search_operators)
+        self.__current_search_operator = self._rng.choice(self._search_operators)
 
         self.__current_relax_operator.reset_size()
         self.__current_search_operator.reset_size()
@@ -165,8 +295,8 @@ class RouletteStrategy(AbstractStrategy):
         self.__alpha = alpha
         self.__lex_weight = lex_weight
     
-    def prepare(self, relax_operators, search_operators):
-        super().prepare(relax_operators, search_operators)
+    def prepare(self, relax_operators, search_operators, rng=random):
+        super().prepare(relax_operators, search_operators, rng)
 
         relax_operators = []
         for op in self._relax_operators:
@@ -183,6 +313,11 @@ class RouletteStrategy(AbstractStrategy):
         for r_op in self._relax_operators:
             for s_op in self._search_operators:
                 self._weights[(r_op, s_op)] = 1
+
+        # the weights are mirrored in a sum tree for sampling in O(log n)
+        self._pairs = list(self._weights.keys())
+        self._indices = { pair: i for i, pair in enumerate(self._pairs) }
+        self._tree = SumTree(list(self._weights.values()))
         
         self._to_initialize = True
 
@@ -195,11 +330,7 @@ class RouletteStrategy(AbstractStrategy):
         returns a pair of relax and search operators depending on the weights
         """        
         
-        # logger.debug('weights: ' + str([ ((r.name(), s.name()), self._weights[(r,s)]) for r, s in self._weights ]))
-        # logger.debug('cummulative sum of weights: ' + str(sum(self._weights.values())))
-        
-        weights = [float(w)/max(self._weights.values()) for w in self._weights.values()]
-        relax_operator, search_operator = random.choices(list(self._weights.keys()), weights=weights, k=1)[0]
+        relax_operator, search_operator = self._pairs[self._tree.sample(self._rng)]
 
         logger.debug('selected relax operator: ' + relax_operator.name())
         logger.debug('selected search operator: ' + search_operator.name())
@@ -220,6 +351,7 @@ class RouletteStrategy(AbstractStrategy):
             if self._to_initialize:
                 for s_r_pair in self._weights:
                     self._weights[s_r_pair] = cost
+                self._tree = SumTree(list(self._weights.values()))
                     
                 self._to_initialize = False
 
@@ -228,16 +360,28 @@ class RouletteStrategy(AbstractStrategy):
             
         else:
             self.update_weights(operators, 0)
-            
-        logger.debug('roulette weights: \n' + str([ ((r.name(), s.name()), self._weights[(r,s)]) for r, s in self._weights ]))
+
+    def get_state(self):
+        state = super().get_state()
+        state['weights'] = [ self._weights[pair] for pair in self._pairs ]
+        state['toInitialize'] = self._to_initialize
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        for pair, weight in zip(self._pairs, state['weights']):
+            self._weights[pair] = weight
+        self._tree = SumTree(state['weights'])
+        self._to_initialize = state['toInitialize']
 
     def update_weights(self, operators, ratio):
         new_weight = (1 - self.__alpha) * self._weights[operators] - self.__alpha * ratio
         if new_weight < 0.001:
             new_weight = 0.001
 
-        logger.debug('updating weight of %s: %f -> %f' % ((operators[0].name(), operators[1].name()), self._weights[operators], new_weight))
+        logger.debug('updating weight of %s: %f -> %f', (operators[0].name(), operators[1].name()), self._weights[operators], new_weight)
         self._weights[operators] = new_weight
+        self._tree.update(self._indices[operators], new_weight)
             
     def calculate_weighted_sum(self, list):
         size = len(list) - 1
@@ -246,6 +390,119 @@ class RouletteStrategy(AbstractStrategy):
             cost += list[i]*(self.__lex_weight**(size-i))
         return cost
 
+class BanditStrategy(AbstractStrategy):
+    """
+    treats each pair of flattened relax and search operators as an arm of a multi-armed bandit.
+    a move is rewarded with 1 if it improves the incumbent and 0 otherwise
+    """
+
+    def prepare(self, relax_operators, search_operators, rng=random):
+        super().prepare(relax_operators, search_operators, rng)
+
+        self._relax_operators = flatten_operators(self._relax_operators)
+        self._search_operators = flatten_operators(self._search_operators)
+
+        self._pairs = [ (r_op, s_op) for r_op in self._relax_operators for s_op in self._search_operators ]
+        self._indices = { pair: i for i, pair in enumerate(self._pairs) }
+        self._plays = [0] * len(self._pairs)
+        self._successes = [0] * len(self._pairs)
+        self._total_plays = 0
+
+        logger.debug('%s strategy selected', self.name())
+        logger.debug('relax operators: ' + str([ o.name() for o in self._relax_operators ]))
+        logger.debug('search operators: ' + str([ o.name() for o in self._search_operators ]))
+
+    def name(self):
+        pass
+
+    def select_operators(self):
+        relax_operator, search_operator = self._pairs[self._select_index()]
+
+        logger.debug('selected relax operator: ' + relax_operator.name())
+        logger.debug('selected search operator: ' + search_operator.name())
+
+        return relax_operator, search_operator
+
+    def _select_index(self):
+        """
+        returns the index of the arm to play next
+        """
+        pass
+
+    def on_move_finished(self, operators, prev_cost, result, time_used):
+        index = self._indices[operators]
+        self._plays[index] += 1
+        self._total_plays += 1
+        if is_improvement(prev_cost, result.cost):
+            self._successes[index] += 1
+
+    def get_state(self):
+        state = super().get_state()
+        state['plays'] = list(self._plays)
+        state['successes'] = list(self._successes)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self._plays = list(state['plays'])
+        self._successes = list(state['successes'])
+        self._total_plays = sum(self._plays)
+
+
+class UCBStrategy(BanditStrategy):
+    """
+    selects the arm with the highest upper confidence bound (UCB1) on its success rate
+    """
+
+    def __init__(self, exploration=math.sqrt(2)):
+        self.__exploration = exploration
+
+    def name(self):
+        return 'ucb'
+
+    def _select_index(self):
+        plays = self._plays
+        successes = self._successes
+
+        # every arm is played once before the confidence bounds are used
+        unplayed = [ i for i in range(len(plays)) if plays[i] == 0 ]
+        if unplayed:
+            return self._rng.choice(unplayed)
+
+        log_total = math.log(self._total_plays)
+        best_index = 0
+        best_bound = -1.0
+        for i in range(len(plays)):
+            bound = successes[i] / plays[i] + self.__exploration * math.sqrt(log_total / plays[i])
+            if bound > best_bound:
+                best_index = i
+                best_bound = bound
+
+        return best_index
+
+
+class ThompsonStrategy(BanditStrategy):
+    """
+    samples a success rate for each arm from its beta posterior and selects the arm with the highest sample
+    """
+
+    def name(self):
+        return 'thompson'
+
+    def _select_index(self):
+        plays = self._plays
+        successes = self._successes
+
+        best_index = 0
+        best_sample = -1.0
+        for i in range(len(plays)):
+            sample = self._rng.betavariate(successes[i] + 1, plays[i] - successes[i] + 1)
+            if sample > best_sample:
+                best_index = i
+                best_sample = sample
+
+        return best_index
+
 # Strategy Factory
 
 def get_strategy(type, args):
@@ -253,7 +510,10 @@ def get_strategy(type, args):
     returns a new strategy of the given type
     """    
     if type == 'random':
-        return RandomStrategy()
+        intensification = False
+        if 'intensification' in args:
+            intensification = args['intensification']
+        return RandomStrategy(supports_intensification=intensification)
     elif type == 'roulette':
         alpha = None
         if 'alpha' in args:
@@ -270,6 +530,13 @@ def get_strategy(type, args):
         if 'timeoutStrikes' in args:
             timeout_strikes = args['timeoutStrikes']
         return DynamicStrategy(unsat_strike_limit=unsat_strikes, timeout_strike_limit=timeout_strikes)
+    elif type == 'ucb':
+        exploration = math.sqrt(2)
+        if 'exploration' in args:
+            exploration = args['exploration']
+        return UCBStrategy(exploration=exploration)
+    elif type == 'thompson':
+        return ThompsonStrategy()
     else:
         raise ValueError("no strategy '%s'" % type)
 
@@ -279,8 +546,8 @@ class InteractiveStrategy(AbstractStrategy):
     def __init__(self, supports_intensification=False):
         self.__supports_intensification = supports_intensification
 
-    def prepare(self, relax_operators, search_operators):
-        super().prepare(relax_operators, search_operators)
+    def prepare(self, relax_operators, search_operators, rng=random):
+        super().prepare(relax_operators, search_operators, rng)
 
         relax_operators = []
         for op in self._relax_operators:
@@ -0,0 +1,104 @@
+import sys
+import json
+import time
+import threading
+from collections import deque
+import logging
+logger = logging.getLogger('root')
+
+FORMAT_JSON = "json"
+FORMAT_CLINGO = "clingo"
+FORMATS = [ FORMAT_JSON, FORMAT_CLINGO ]
+
+
+class SolutionStream:
+
+    def __init__(self, path='-', fmt=FORMAT_JSON, capacity=16):
+        """
+        streams improving solutions to the given file or fifo ('-' for stdout) as json lines or in the
+        output format of clingo. solutions are written by a background thread, hence a slow consumer never
+        stalls the lns loop: if more than capacity solutions are pending, the oldest ones are dropped
+        """
+        if fmt not in FORMATS:
+            raise ValueError('no stream format "%s"' % fmt)
+
+        self.__path = path
+        self.__format = fmt
+        self.__pending = deque(maxlen=capacity)
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__count = 0
+        self.__dropped = 0
+        self.__written = 0
+        self.__start_time = time.time()
+
+        self.__thread = threading.Thread(target=self.__write_loop, daemon=True)
+        self.__thread.start()
+
+    def publish(self, solution):
+        """
+        queues the given solution, its shown atoms are only created and converted to strings by the writer thread
+        """
+        with self.__condition:
+            if len(self.__pending) == self.__pending.maxlen:
+                self.__dropped += 1
+            self.__count += 1
+            self.__pending.append((self.__count, time.time(), solution.cost, solution.model))
+            self.__condition.notify()
+
+    def close(self, timeout=5):
+        """
+        writes the pending solutions and closes the stream. waits at most timeout seconds for the writer thread,
+        which blocks while a fifo has no reader or a consumer stalls, the daemon thread is then abandoned
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify()
+        self.__thread.join(timeout)
+
+        if self.__thread.is_alive():
+            with self.__condition:
+                unflushed = self.__count - self.__dropped - self.__written
+            logger.warning('solution stream blocked, %i solutions were not written' % unflushed)
+
+        if self.__dropped > 0:
+            logger.debug('dropped %i solutions of the stream' % self.__dropped)
+
+    def __format_solution(self, number, timestamp, cost, model):
+        shown = model.shown
+        if self.__format == FORMAT_JSON:
+            return json.dumps({ 'number': number, 'time': timestamp, 'elapsed': timestamp - self.__start_time,
+                                'cost': cost, 'atoms': [ str(a) for a in shown ] }) + '\n'
+
+        costs = cost if isinstance(cost, list) else [ cost ]
+        return 'Answer: %i\n%s\nOptimization: %s\n' % (number, ' '.join(str(a) for a in shown),
+                                                       ' '.join(str(c) for c in costs))
+
+    def __write_loop(self):
+        # opening a fifo blocks until there is a reader, hence this is done by the writer thread as well
+        out = sys.stdout if self.__path == '-' else open(self.__path, 'w')
+        try:
+            while True:
+                with self.__condition:
+                    while len(self.__pending) == 0 and not self.__closed:
+                        self.__condition.wait()
+                    batch = list(self.__pending)
+                    self.__pending.clear()
+                    closed = self.__closed
+
+                for solution in batch:
+                    out.write(self.__format_solution(*solution))
+                out.flush()
+
+                with self.__condition:
+                    self.__written += len(batch)
+
+                if closed:
+                    break
+        except (BrokenPipeError, OSError) as e:
+            logger.warning('solution stream closed: ' + str(e))
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,72 @@
+import json
+import time
+import logging
+logger = logging.getLogger('root')
+
+OUTCOME_INITIAL = "initial"
+OUTCOME_IMPROVED = "improved"
+OUTCOME_SAT = "sat"
+OUTCOME_UNSAT = "unsat"
+OUTCOME_TIMEOUT = "timeout"
+
+# counters of solver.Clingo.get_statistics reported per move
+SOLVER_STATISTICS = [ 'modelCopyTime', 'boundTime', 'conflicts', 'choices', 'restarts' ]
+
+
+class MoveTracer:
+
+    def __init__(self, path):
+        """
+        writes one json object per lns move to the given file (json lines). each record contains the
+        move number, the elapsed time, the operators and their current sizes, the relax time, the number of assumptions, the solve time,
+        the outcome and the cost as well as the differences of the solver statistics (see SOLVER_STATISTICS)
+        """
+        self.__path = path
+        self.__file = open(path, 'w', buffering=1)
+        self.__start_time = time.time()
+        self.__move = 0
+        self.__statistics = None
+
+    def start(self, internal_solver):
+        """
+        called when the lns search starts, the elapsed time of all records is relative to this call
+        """
+        self.__start_time = time.time()
+        self.__move = 0
+        internal_solver.enable_statistics()
+        self.__statistics = internal_solver.get_statistics()
+
+    def record(self, internal_solver, outcome, cost, **fields):
+        """
+        writes the record of a finished move (or of the initial solution), the solver statistics are
+        reported relative to the previous record
+        """
+        statistics = internal_solver.get_statistics()
+
+        record = { 'move': self.__move, 'elapsed': time.time() - self.__start_time, 'outcome': outcome, 'cost': cost }
+        record.update(fields)
+        for key in SOLVER_STATISTICS:
+            record[key] = statistics[key] - self.__statistics[key]
+
+        self.__statistics = statistics
+        self.__move += 1
+
+        self.__file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.__file.close()
+        logger.debug('written trace to ' + self.__path)
+
+
+def read_trace(path):
+    """
+    returns the list of records of the given trace file
+    """
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+
+    return records